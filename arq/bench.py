@@ -0,0 +1,194 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib
+import statistics
+
+import numpy as np
+
+from arq.codec import get_codec, get_crc_function
+
+FRAME_SIZES = [600, 800, 1000]
+NODE_COUNTS = [5, 10, 25]
+RS_N, RS_K = 255, 223
+TOPOLOGIES = ['bus', 'star', 'mesh', 'grid']
+PROTOCOLS = ['gbn', 'sr']
+WINDOW_SIZE = 100
+
+
+def time_op(op, rounds, min_time):
+    # Calibrates the number of calls per round so a round lasts at least min_time,
+    # then returns ops/sec for each round.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed * 1.2))
+    samples = [number / elapsed]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        samples.append(number / (time.perf_counter() - start))
+    return samples
+
+
+def _module(topology, protocol):
+    return importlib.import_module(f"{topology}.{protocol}_reed")
+
+
+def _sender(protocol, frame_size):
+    module = _module('bus', protocol)
+    if protocol == 'gbn':
+        return module.GoBackNSender(0.0, frame_size, RS_N, RS_K)
+    return module.SelectiveRepeatSender(0.0, frame_size, WINDOW_SIZE, RS_N, RS_K)
+
+
+def _receiver(protocol):
+    module = _module('bus', protocol)
+    if protocol == 'gbn':
+        return module.GoBackNReceiver(0.0, 1, RS_N, RS_K)
+    return module.SelectiveRepeatReceiver(0.0, WINDOW_SIZE, 1, RS_N, RS_K)
+
+
+def _corrupt(data, num_bytes):
+    corrupted = bytearray(data)
+    for position in range(0, num_bytes * 7, 7):
+        corrupted[position] ^= 0x5a
+    return corrupted
+
+
+def benchmarks():
+    for protocol in PROTOCOLS:
+        for frame_size in FRAME_SIZES:
+            sender = _sender(protocol, frame_size)
+            yield f"create_frame/{protocol}/{frame_size}", lambda sender=sender: sender.create_frame(0)
+
+    for protocol in PROTOCOLS:
+        for state in ('clean', 'corrupted'):
+            for frame_size in FRAME_SIZES:
+                receiver = _receiver(protocol)
+                frame = _sender(protocol, frame_size).create_frame(0)
+                if state == 'corrupted':
+                    frame.data = _corrupt(frame.data, 4)
+
+                def op(receiver=receiver, frame=frame):
+                    frame.seq_num = receiver.expected_seq_num[0]
+                    receiver.read_frame(frame, 0)
+
+                yield f"read_frame/{protocol}/{state}/{frame_size}", op
+
+    rng = np.random.default_rng(0)
+    for backend in ('numpy', 'reedsolo'):
+        codec = get_codec(RS_N - RS_K, RS_N, backend=backend)
+        for frame_size in FRAME_SIZES:
+            data = bytearray(rng.bytes(frame_size))
+            encoded = codec.encode(data)
+            corrupted = _corrupt(encoded, 4)
+            yield f"rs_encode/{backend}/{frame_size}", lambda codec=codec, data=data: codec.encode(data)
+            yield f"rs_decode/{backend}/clean/{frame_size}", lambda codec=codec, data=encoded: codec.decode(data)
+            yield f"rs_decode/{backend}/corrupted/{frame_size}", lambda codec=codec, data=corrupted: codec.decode(data)
+
+    crc = get_crc_function()
+    for frame_size in FRAME_SIZES:
+        data = bytes(rng.bytes(frame_size))
+        yield f"crc16/{frame_size}", lambda data=data: crc(data)
+
+    for topology in TOPOLOGIES:
+        for protocol in PROTOCOLS:
+            module = _module(topology, protocol)
+            for num_nodes in NODE_COUNTS:
+                params = dict(error_rate=0.05, frame_size=600, num_frames=10, rs_k=RS_K, rs_n=RS_N, timeout=1)
+                if topology == 'grid':
+                    params.update(num_rows=5, num_cols=max(1, num_nodes // 5))
+                else:
+                    params.update(num_nodes=num_nodes)
+                if protocol == 'sr':
+                    params.update(window_size=WINDOW_SIZE)
+                counter = iter(range(sys.maxsize))
+                yield (f"run_simulation/{topology}/{protocol}/{num_nodes}",
+                       lambda module=module, params=params, counter=counter: module.run_trial(next(counter), **params))
+
+
+def run(rounds=5, min_time=0.1, name_filter=None):
+    results = {}
+    for name, op in benchmarks():
+        if name_filter and not any(part in name for part in name_filter):
+            continue
+        samples = time_op(op, rounds, min_time)
+        results[name] = {
+            'ops_per_sec': statistics.fmean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'samples': samples,
+        }
+        print(f"{name:45s} {results[name]['ops_per_sec']:14,.1f} ops/s  +/- {results[name]['stdev']:,.1f}")
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'rounds': rounds,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    # A benchmark regresses when it is more than `threshold` slower and the gap is
+    # larger than two combined standard deviations.
+    regressions = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        old = baseline['results'][name]
+        new = current['results'][name]
+        change = new['ops_per_sec'] / old['ops_per_sec'] - 1
+        noise = 2 * (old['stdev'] ** 2 + new['stdev'] ** 2) ** 0.5
+        slower = change < -threshold and old['ops_per_sec'] - new['ops_per_sec'] > noise
+        if slower:
+            regressions.append(name)
+        flag = 'SLOWER' if slower else ''
+        print(f"{name:45s} {old['ops_per_sec']:14,.1f} -> {new['ops_per_sec']:14,.1f} ops/s  {change:+7.1%} {flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m arq.bench', description='ARQ hot-path microbenchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--output', help='write results as JSON')
+    run_parser.add_argument('--rounds', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='minimum seconds per round')
+    run_parser.add_argument('--filter', nargs='+', help='only run benchmarks whose name contains one of these')
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown to report')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.rounds, args.min_time, args.filter)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
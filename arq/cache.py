@@ -0,0 +1,64 @@
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import functools
+
+ARQ_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(source_file):
+    # Hash of the trial's script and of the shared arq package, so results are
+    # recomputed whenever the simulation code changes.
+    digest = hashlib.sha256()
+    for path in [source_file] + sorted(glob.glob(os.path.join(ARQ_DIR, '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def point_key(trial_fn, params, seed, trials):
+    source_file = os.path.abspath(inspect.getsourcefile(trial_fn))
+    identity = os.path.relpath(source_file, os.path.dirname(ARQ_DIR))
+    payload = json.dumps({
+        'trial_fn': identity,
+        'code_version': code_version(source_file),
+        'params': params,
+        'seed': seed,
+        'trials': trials,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SweepCache:
+    # Content-addressed store of finished sweep points. Each point is committed as
+    # soon as it completes, so an interrupted sweep resumes where it stopped.
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS points '
+                           '(key TEXT PRIMARY KEY, params TEXT, results TEXT, created REAL)')
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, key):
+        row = self._conn.execute('SELECT results FROM points WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, params, results):
+        self._conn.execute('INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?)',
+                           (key, json.dumps(params, sort_keys=True), json.dumps(results), time.time()))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,56 @@
+import numpy as np
+
+BIT_ERROR_RATE = 0.0
+MASK_WINDOW = 64
+
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.int64)
+
+
+def measured_ber(channels):
+    # Bit errors per bit sent over all the given channels.
+    bits_sent = sum(channel.bits_sent for channel in channels)
+    return sum(channel.bit_errors for channel in channels) / bits_sent if bits_sent else 0.0
+
+
+class BitErrorChannel:
+    # Flips independent bits with probability bit_error_rate. Error masks are drawn
+    # in bulk for a window of frames into a preallocated buffer.
+
+    def __init__(self, bit_error_rate=BIT_ERROR_RATE, rng=None, window=MASK_WINDOW):
+        if rng is None:
+            rng = np.random.default_rng()
+        self.bit_error_rate = bit_error_rate
+        self.rng = rng
+        self.window = window
+        self.bits_sent = 0
+        self.bit_errors = 0
+        self._masks = None
+        self._flips = None
+        self._next = 0
+
+    def _draw_masks(self, frame_len):
+        if self._masks is None or self._masks.shape[1] != frame_len:
+            self._masks = np.zeros((self.window, frame_len), dtype=np.uint8)
+        else:
+            self._masks.fill(0)
+        total_bits = self._masks.size * 8
+        num_errors = self.rng.binomial(total_bits, self.bit_error_rate)
+        if num_errors:
+            positions = self.rng.integers(0, total_bits, size=num_errors)
+            flat = self._masks.reshape(-1)
+            np.bitwise_xor.at(flat, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+        self._flips = POPCOUNT[self._masks].sum(axis=1)
+        self._next = 0
+
+    def corrupt(self, frame):
+        frame_len = len(frame.data)
+        if self._masks is None or self._next == self.window or self._masks.shape[1] != frame_len:
+            self._draw_masks(frame_len)
+        flips = int(self._flips[self._next])
+        if flips:
+            data = np.frombuffer(frame.data, dtype=np.uint8)
+            np.bitwise_xor(data, self._masks[self._next], out=data)
+        self._next += 1
+        self.bits_sent += frame_len * 8
+        self.bit_errors += flips
+        return flips
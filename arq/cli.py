@@ -0,0 +1,323 @@
+import os
+import json
+import math
+import time
+import argparse
+import statistics
+import importlib
+import itertools
+
+from arq.cache import SweepCache
+from arq.parallel import run_trials, run_adaptive, finished_stats
+from arq.stats import CONFIDENCE
+from arq.montecarlo import simulate_points
+from arq.analytic import predict, can_skip, MIN_FRAMES, MAX_TOLERANCE
+from arq.paired import paired_trial, pair_points, PAIR
+from arq.results import ResultsWriter
+from arq.instrument import merge_profiles, summarize
+from arq.topology import num_senders
+from arq.trial import trial_parameters
+
+TOPOLOGIES = ['bus', 'star', 'mesh', 'grid']
+PROTOCOLS = ['gbn', 'sr']
+
+# Points and repetitions per point that --dry-run times.
+PROBE_POINTS = 5
+PROBE_REPEATS = 3
+
+# name -> (type, base value). Axes with no base value are only passed to the trial
+# when given, so the default sweep keeps the parameter sets of the old scripts.
+AXES = {
+    'error_rate': (float, 0.05),
+    'frame_size': (int, 600),
+    'num_frames': (int, 60),
+    'num_nodes': (int, 5),
+    'num_rows': (int, 5),
+    'num_cols': (int, 1),
+    'window_size': (int, 100),
+    'rs_n': (int, 255),
+    'rs_k': (int, 223),
+    'timeout': (float, 1),
+    'bit_error_rate': (float, None),
+    'order': (str, None),
+    'fec_mode': (str, None),
+    'importance_rate': (float, None),
+    'transport': (str, None),
+    'net_loss': (float, None),
+    'net_delay': (float, None),
+}
+
+# The four sweeps the scripts' main() always ran, one axis at a time.
+DEFAULT_SWEEPS = [
+    ('num_nodes', list(range(5, 26, 5))),
+    ('num_cols', list(range(1, 6))),
+    ('frame_size', list(range(600, 1001, 100))),
+    ('num_frames', list(range(60, 91, 10))),
+    ('error_rate', [0.05 * i for i in range(1, 6)]),
+]
+
+
+def parse_values(spec, kind):
+    # "600" -> [600]; "600,800" -> [600, 800]; "600:1000:100" -> [600, 700, ..., 1000]
+    if isinstance(spec, (list, tuple)):
+        return [value for item in spec for value in parse_values(item, kind)]
+    if not isinstance(spec, str):
+        return [kind(spec)]
+    if ':' in spec:
+        start, stop, step = (kind(part) for part in spec.split(':'))
+        if step <= 0:
+            raise ValueError(f"Range step must be positive: {spec}")
+        count = int(round((stop - start) / step + 1e-9)) + 1
+        return [kind(start + i * step) for i in range(count)]
+    return [kind(part) for part in spec.split(',') if part]
+
+
+def load_config(path):
+    with open(path, 'rb') as f:
+        if path.endswith('.toml'):
+            import tomllib
+            return tomllib.load(f)
+        return json.load(f)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m arq', description='Run ARQ protocol sweeps.')
+    parser.add_argument('--config', help='JSON or TOML file with any of the options below')
+    parser.add_argument('--topology', nargs='+', choices=TOPOLOGIES)
+    parser.add_argument('--protocol', nargs='+', choices=PROTOCOLS)
+    for name in AXES:
+        parser.add_argument('--' + name.replace('_', '-'), nargs='+', metavar='VALUES',
+                            help='values as a list, a comma list or start:stop:step')
+    parser.add_argument('--mode', choices=['grid', 'axes'],
+                        help='grid: every combination of the given values; '
+                             'axes: vary one axis at a time around the first value of the others')
+    parser.add_argument('--trials', type=int)
+    parser.add_argument('--target-ci', type=float, metavar='FRACTION',
+                        help='run each point until the confidence interval of its mean throughput is within '
+                             'this fraction of the mean (e.g. 0.05) instead of a fixed number of trials')
+    parser.add_argument('--min-trials', type=int, help='trials every point runs first with --target-ci (default 5)')
+    parser.add_argument('--max-trials', type=int, help='trial budget per point with --target-ci (default 200)')
+    parser.add_argument('--confidence', type=float, help=f'confidence level of the intervals (default {CONFIDENCE})')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help='results file (.jsonl, .csv, .parquet or .arrow)')
+    parser.add_argument('--cache', help='SQLite file used to skip already computed points')
+    parser.add_argument('--profile', action='store_true',
+                        help='time each simulation phase per sender and for the receiver (bypasses --cache)')
+    parser.add_argument('--engine', choices=['events', 'montecarlo'],
+                        help='events: the discrete-event simulation (default); '
+                             'montecarlo: draw whole trials from the equivalent closed-form distributions')
+    parser.add_argument('--predict', action='store_true', help='print the analytic prediction next to each result')
+    parser.add_argument('--skip-accurate', type=float, metavar='TOLERANCE',
+                        help='report the analytic prediction instead of simulating points whose '
+                             f'model error estimate is below TOLERANCE (e.g. 0.01, at most {MAX_TOLERANCE}); '
+                             f'points with fewer than {MIN_FRAMES} frames per trial are always simulated')
+    parser.add_argument('--paired', action='store_true',
+                        help='run SR and GBN on common random numbers and report the SR - GBN difference per point')
+    parser.add_argument('--dry-run', action='store_true', help='print the sweep size and a cost estimate only')
+    return parser
+
+
+def resolve_options(args, topologies=None, protocols=None):
+    options = load_config(args.config) if args.config else {}
+    for key, value in vars(args).items():
+        # Compared by identity: --seed 0 is a value, only unset options are None/False.
+        if key != 'config' and value is not None and value is not False:
+            options[key] = value
+    options.setdefault('topology', topologies or TOPOLOGIES)
+    options.setdefault('protocol', protocols or PROTOCOLS)
+    options['topology'] = parse_values(options['topology'], str)
+    options['protocol'] = parse_values(options['protocol'], str)
+    options.setdefault('trials', 25)
+    options.setdefault('dry_run', False)
+    options.setdefault('profile', False)
+    options.setdefault('engine', 'events')
+    options.setdefault('predict', False)
+    options.setdefault('paired', False)
+    options.setdefault('min_trials', 5)
+    options.setdefault('max_trials', 200)
+    options.setdefault('confidence', CONFIDENCE)
+    return options
+
+
+def sweep_points(options):
+    given = {name: parse_values(options[name], kind) for name, (kind, base) in AXES.items() if name in options}
+    base = {name: values[0] for name, values in given.items()}
+    for name, (kind, value) in AXES.items():
+        if value is not None:
+            base.setdefault(name, value)
+
+    mode = options.get('mode') or ('grid' if given else 'axes')
+    if mode == 'grid':
+        names = list(given)
+        return [dict(base, **dict(zip(names, combo))) for combo in itertools.product(*(given[n] for n in names))]
+
+    sweeps = [(name, values) for name, values in given.items() if len(values) > 1] if given else DEFAULT_SWEEPS
+    # With a single value per given axis there is nothing to vary: run the base point.
+    return [dict(base, **{name: value}) for name, values in sweeps for value in values] or [base]
+
+
+def trial_points(trial_fn, points):
+    accepted = [name for name in trial_parameters(trial_fn) if name != 'seed']
+    trial_points = []
+    for point in points:
+        params = {name: point[name] for name in accepted if name in point}
+        if params not in trial_points:
+            trial_points.append(params)
+    return trial_points
+
+
+def expected_attempts(params):
+    # Each frame needs both the sender and the receiver coin flip to succeed.
+    return params['num_frames'] / (1 - params['error_rate']) ** 2
+
+
+def probe_seconds(module, params):
+    # Median CPU time of a few trials, so one slow run does not skew the estimate.
+    times = []
+    for seed in range(1, PROBE_REPEATS + 1):
+        start = time.process_time()
+        module.run_trial(seed, **params)
+        times.append(time.process_time() - start)
+    return statistics.median(times)
+
+
+def estimate(module, topology, points, trials):
+    # Times up to PROBE_POINTS points spread over the sweep at their real size, so
+    # the per-trial setup (endpoints, payload windows) is paid as in the sweep.
+    attempts = [num_senders(topology, params) * expected_attempts(params) for params in points]
+    step = math.ceil(len(points) / PROBE_POINTS)
+    module.run_trial(0, **points[0])
+    seconds_per_attempt = (sum(probe_seconds(module, params) for params in points[::step])
+                           / sum(attempts[::step]))
+    return sum(attempts) * trials, sum(attempts) * trials * seconds_per_attempt
+
+
+def describe(params):
+    return ', '.join(f"{name}={value}" for name, value in params.items())
+
+
+def mean(stats):
+    return stats.mean if stats.count else math.nan
+
+
+def print_stalled(stalled, total, unit):
+    # Means and intervals cover the trials that finished; SR trials that stall for
+    # good are only counted.
+    if stalled:
+        print(f"Stalled: {stalled} of {total} {unit} ({stalled / total:.0%}), left out of the means")
+
+
+def main(argv=None, topologies=None, protocols=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    options = resolve_options(args, topologies, protocols)
+    points = sweep_points(options)
+    if options['engine'] == 'montecarlo' and any(point.get('transport') == 'udp' for point in points):
+        parser.error("--engine montecarlo draws simulated trials; it cannot run --transport udp")
+    if options.get('skip_accurate') is not None and not 0 < options['skip_accurate'] <= MAX_TOLERANCE:
+        parser.error(f"--skip-accurate must be in (0, {MAX_TOLERANCE}]: larger model error estimates "
+                     "can fall short of the actual error")
+    trials = options['trials']
+    workers = options.get('workers') or os.cpu_count() or 1
+
+    sink = ResultsWriter(options['output']) if options.get('output') and not options['dry_run'] else None
+    cache = SweepCache(options['cache']) if options.get('cache') and not options['dry_run'] else None
+    total_attempts = total_seconds = 0
+    try:
+        for topology in options['topology']:
+            if options['paired'] and not options['dry_run']:
+                print(f"== {topology} {PAIR[1]} - {PAIR[0]} ==")
+                pairs = pair_points(topology, points)
+                # Not cached: the key only covers arq/, not the two scripts a pair runs.
+                if options.get('target_ci') is not None:
+                    point_results = run_adaptive(paired_trial, pairs, options['min_trials'], options['max_trials'],
+                                                 options['target_ci'], options['confidence'], options.get('seed'), workers)
+                else:
+                    point_results = run_trials(paired_trial, pairs, trials, options.get('seed'), workers)
+                confidence = options['confidence']
+                for params, results in point_results:
+                    throughput, ber, stalled = finished_stats(results)
+                    print(describe(params))
+                    print(f"SR - GBN throughput: {mean(throughput)} frames/sec "
+                          f"(+/- {throughput.half_width(confidence):.4g} at {confidence:.0%}, {throughput.count} pairs)")
+                    print(f"SR - GBN retransmission ratio: {mean(ber)} (+/- {ber.half_width(confidence):.4g})")
+                    print_stalled(stalled, len(results), 'pairs')
+                    if throughput.count and not (throughput.mean or throughput.variance or ber.mean or ber.variance):
+                        # The simulated link carries one frame per sender at a time, so under
+                        # common random numbers every pair that finishes is identical.
+                        print("Note: SR and GBN behave identically on the simulated link; "
+                              "the difference is only informative with --transport udp or where SR stalls")
+                    if sink is not None:
+                        sink.write_point(topology, '-'.join(reversed(PAIR)), params, results, options.get('seed'))
+                continue
+
+            for protocol in options['protocol']:
+                module = importlib.import_module(f"{topology}.{protocol}_reed")
+                run_trial = module.run_trial
+                protocol_points = trial_points(run_trial, points)
+                if options['dry_run']:
+                    attempts, seconds = estimate(module, topology, protocol_points, trials)
+                    total_attempts += attempts
+                    total_seconds += seconds
+                    print(f"{topology} {protocol}: {len(protocol_points)} points x {trials} trials, "
+                          f"~{attempts:,.0f} frame transmissions, ~{seconds:,.1f} CPU s")
+                    continue
+
+                print(f"== {topology} {protocol} ==")
+                predictions = {}
+                if options['predict'] or options.get('skip_accurate') is not None:
+                    predictions = {describe(params): predict(protocol, topology, params) for params in protocol_points}
+                if options.get('skip_accurate') is not None:
+                    simulated = []
+                    for params in protocol_points:
+                        prediction = predictions[describe(params)]
+                        if prediction.relative_error >= options['skip_accurate'] or not can_skip(topology, params):
+                            simulated.append(params)
+                            continue
+                        print(describe(params))
+                        print(f"Throughput: {prediction.throughput} frames/sec (model)")
+                        print(f"Retransmission ratio: {prediction.ber} (model)")
+                        if sink is not None:
+                            sink.write_prediction(topology, protocol, params, prediction)
+                    protocol_points = simulated
+
+                if options['engine'] == 'montecarlo':
+                    point_results = simulate_points(topology, protocol, protocol_points, trials, options.get('seed'))
+                elif options.get('target_ci') is not None:
+                    point_results = run_adaptive(run_trial, protocol_points, options['min_trials'], options['max_trials'],
+                                                 options['target_ci'], options['confidence'], options.get('seed'),
+                                                 workers, cache, options['profile'])
+                else:
+                    point_results = run_trials(run_trial, protocol_points, trials, options.get('seed'), workers, cache,
+                                               options['profile'])
+                confidence = options['confidence']
+                for params, results in point_results:
+                    throughput, ber, stalled = finished_stats(results)
+                    print(describe(params))
+                    print(f"Throughput: {mean(throughput)} frames/sec "
+                          f"(+/- {throughput.half_width(confidence):.4g} at {confidence:.0%}, {throughput.count} trials)")
+                    print(f"Retransmission ratio: {mean(ber)} (+/- {ber.half_width(confidence):.4g})")
+                    print_stalled(stalled, len(results), 'trials')
+                    channel_bers = [result.channel_ber for result in results if result.channel_ber is not None]
+                    if channel_bers:
+                        print(f"Bit Error Rate: {sum(channel_bers) / len(channel_bers)} (measured on the channel)")
+                    if options['predict']:
+                        prediction = predictions[describe(params)]
+                        print(f"Predicted: {prediction.throughput} frames/sec, {prediction.ber} "
+                              f"(error estimate {prediction.relative_error:.1%})")
+                    if options['profile'] and options['engine'] == 'events':
+                        print(f"Phases: {summarize(merge_profiles(result.profile for result in results))}")
+                    # A resumed sweep already wrote the points it finished before.
+                    if sink is not None and not all(result.cached for result in results):
+                        sink.write_point(topology, protocol, params, results, options.get('seed'))
+    finally:
+        if sink is not None:
+            sink.close()
+        if cache is not None:
+            cache.close()
+
+    if options['dry_run']:
+        print(f"Total: ~{total_attempts:,.0f} frame transmissions, ~{total_seconds:,.1f} CPU s, "
+              f"~{total_seconds / workers:,.1f} s wall on {workers} workers")
+    return 0
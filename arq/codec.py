@@ -0,0 +1,38 @@
+import functools
+
+import crcmod.predefined
+from reedsolo import RSCodec
+
+from arq.fec import NumpyRSCodec
+
+CRC_NAME = 'crc-16'
+
+FEC_BACKENDS = {
+    'reedsolo': RSCodec,
+    'numpy': NumpyRSCodec,
+}
+DEFAULT_FEC_BACKEND = 'numpy'
+
+
+# RSCodec restores its own Galois tables on every encode/decode call, so one
+# instance per parameter set can be shared by every endpoint in the process.
+@functools.lru_cache(maxsize=None)
+def _codec(nsym, nsize, prim, fcr, backend):
+    if backend not in FEC_BACKENDS:
+        raise ValueError(f"Unknown FEC backend: {backend}")
+    return FEC_BACKENDS[backend](nsym, nsize=nsize, fcr=fcr, prim=prim)
+
+
+def get_codec(nsym, nsize=255, prim=0x11d, fcr=0, backend=DEFAULT_FEC_BACKEND):
+    return _codec(nsym, nsize, prim, fcr, backend)
+
+
+@functools.lru_cache(maxsize=None)
+def get_crc_function(name=CRC_NAME):
+    return crcmod.predefined.mkCrcFun(name)
+
+
+def warm_codecs(codec_keys=()):
+    get_crc_function()
+    for key in codec_keys:
+        get_codec(*key)
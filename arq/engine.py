@@ -0,0 +1,32 @@
+import heapq
+import itertools
+
+# Link model used to advance the simulated clock. Times are in seconds.
+PROPAGATION_DELAY = 0.005
+PROCESSING_DELAY = 0.001
+BANDWIDTH = 125000  # bytes/sec (1 Mbit/s)
+
+
+class Simulator:
+    def __init__(self):
+        self.now = 0.0
+        self._queue = []
+        self._order = itertools.count()
+        self._stopped = False
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self._queue, (self.now + delay, next(self._order), callback, args))
+
+    def stop(self):
+        # Ends run() before the queue drains, e.g. once a trial can no longer finish.
+        self._stopped = True
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def run(self):
+        while self._queue and not self._stopped:
+            self.now, _, callback, args = heapq.heappop(self._queue)
+            callback(*args)
+        return self.now
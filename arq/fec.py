@@ -0,0 +1,227 @@
+import numpy as np
+import reedsolo
+from reedsolo import RSCodec, ReedSolomonError
+
+
+def _gf_mult_nolut(x, y, prim, field_charac_full):
+    result = 0
+    while y:
+        if y & 1:
+            result ^= x
+        y >>= 1
+        x <<= 1
+        if x & field_charac_full:
+            x ^= prim
+    return result
+
+
+class NumpyRSCodec:
+    # Drop-in for reedsolo.RSCodec (GF(2^8) only). Encoding is table driven: the
+    # parity of a codeword is linear in its message bytes, so it is the XOR of one
+    # precomputed nsym-byte contribution per (position, byte value). Syndromes are
+    # computed the same way, and only the codewords of a frame with a non-zero
+    # syndrome are handed to reedsolo's Berlekamp-Massey/Forney decoder.
+
+    def __init__(self, nsym=10, nsize=255, fcr=0, prim=0x11d, generator=2, c_exp=8):
+        if c_exp != 8 or nsize > 255:
+            raise ValueError('NumpyRSCodec only supports GF(2^8) codewords (nsize <= 255).')
+        if nsym >= nsize:
+            raise ValueError('ECC symbols must be strictly less than the total message length (nsym < nsize).')
+        self.nsym = nsym
+        self.nsize = nsize
+        self.fcr = fcr
+        self.prim = prim
+        self.generator = generator
+        self.c_exp = c_exp
+        self.chunk_size = nsize - nsym
+        self._reference = RSCodec(nsym, nsize=nsize, fcr=fcr, prim=prim, generator=generator, c_exp=c_exp)
+
+        self.gf_exp = np.zeros(512, dtype=np.int32)
+        self.gf_log = np.zeros(256, dtype=np.int32)
+        x = 1
+        for i in range(255):
+            self.gf_exp[i] = x
+            self.gf_log[x] = i
+            x = _gf_mult_nolut(x, generator, prim, 256)
+        self.gf_exp[255:510] = self.gf_exp[:255]
+
+        self.gen = self._generator_poly()
+        self._parity_table = self._build_parity_table()
+        self._syndrome_table = self._build_syndrome_table()
+
+    def _mul(self, a, b):
+        if a == 0 or b == 0:
+            return 0
+        return int(self.gf_exp[self.gf_log[a] + self.gf_log[b]])
+
+    def _generator_poly(self):
+        g = [1]
+        for i in range(self.nsym):
+            root = int(self.gf_exp[(self.gf_log[self.generator] * (i + self.fcr)) % 255])
+            product = [0] * (len(g) + 1)
+            for j, coef in enumerate(g):
+                product[j] ^= coef
+                product[j + 1] ^= self._mul(coef, root)
+            g = product
+        return g
+
+    def _build_parity_table(self):
+        # remainders[m] = x^(nsym + m) mod g(x), highest degree first.
+        remainders = np.zeros((self.chunk_size, self.nsym), dtype=np.int32)
+        r = list(self.gen[1:])
+        for m in range(self.chunk_size):
+            remainders[m] = r
+            top = r[0]
+            r = r[1:] + [0]
+            if top:
+                r = [coef ^ self._mul(top, g) for coef, g in zip(r, self.gen[1:])]
+
+        values = np.arange(256)
+        log_v = self.gf_log[values][None, :, None]
+        log_r = self.gf_log[remainders][:, None, :]
+        table = self.gf_exp[log_v + log_r]
+        table[:, 0, :] = 0
+        table[np.broadcast_to(remainders[:, None, :] == 0, table.shape)] = 0
+        return table.astype(np.uint8)
+
+    def _build_syndrome_table(self):
+        # table[d, v, j] = v * alpha^((fcr + j) * d), the contribution of byte v at
+        # degree d to syndrome j.
+        log_alpha = int(self.gf_log[self.generator])
+        degrees = np.arange(self.nsize)[:, None]
+        roots = (np.arange(self.nsym) + self.fcr)[None, :]
+        log_powers = (log_alpha * roots * degrees) % 255
+        table = self.gf_exp[self.gf_log[np.arange(256)][None, :, None] + log_powers[:, None, :]]
+        table[:, 0, :] = 0
+        return table.astype(np.uint8)
+
+    def encode_blocks(self, blocks):
+        # blocks: (num_blocks, length) uint8 with length <= chunk_size.
+        length = blocks.shape[1]
+        positions = np.arange(length - 1, -1, -1)
+        contributions = self._parity_table[positions, blocks]
+        return np.bitwise_xor.reduce(contributions, axis=1)
+
+    def encoded_size(self, frame_size):
+        num_full, tail = divmod(frame_size, self.chunk_size)
+        return frame_size + (num_full + (1 if tail else 0)) * self.nsym
+
+    def encode_batch(self, messages, out=None):
+        # messages: (num_frames, frame_size) uint8. Returns (num_frames, encoded_size),
+        # written into out when given.
+        messages = np.asarray(messages, dtype=np.uint8)
+        num_frames, frame_size = messages.shape
+        num_full, tail = divmod(frame_size, self.chunk_size)
+        if out is None:
+            out = np.empty((num_frames, self.encoded_size(frame_size)), dtype=np.uint8)
+        stride = self.nsize
+
+        if num_full:
+            full = messages[:, :num_full * self.chunk_size].reshape(num_frames * num_full, self.chunk_size)
+            parity = self.encode_blocks(full)
+            body = out[:, :num_full * stride].reshape(num_frames, num_full, stride)
+            body[:, :, :self.chunk_size] = full.reshape(num_frames, num_full, self.chunk_size)
+            body[:, :, self.chunk_size:] = parity.reshape(num_frames, num_full, self.nsym)
+        if tail:
+            last = messages[:, num_full * self.chunk_size:]
+            start = num_full * stride
+            out[:, start:start + tail] = last
+            out[:, start + tail:] = self.encode_blocks(last)
+        return out
+
+    def syndromes(self, blocks):
+        # blocks: (num_blocks, length) uint8 codewords. Returns (num_blocks, nsym).
+        length = blocks.shape[1]
+        degrees = np.arange(length - 1, -1, -1)
+        contributions = self._syndrome_table[degrees, blocks]
+        return np.bitwise_xor.reduce(contributions, axis=1)
+
+    def _layout(self, encoded_size):
+        num_full, tail = divmod(encoded_size, self.nsize)
+        if tail and tail <= self.nsym:
+            raise ValueError(f"Invalid encoded length: {encoded_size}")
+        return num_full, tail
+
+    def chunk_syndromes(self, codewords):
+        # codewords: (num_frames, encoded_size) uint8. Returns the syndromes of every
+        # RS codeword of every frame, (num_frames, chunks, nsym).
+        codewords = np.asarray(codewords, dtype=np.uint8)
+        num_frames, encoded_size = codewords.shape
+        num_full, tail = self._layout(encoded_size)
+        parts = []
+        if num_full:
+            full = codewords[:, :num_full * self.nsize].reshape(num_frames * num_full, self.nsize)
+            parts.append(self.syndromes(full).reshape(num_frames, num_full, self.nsym))
+        if tail:
+            parts.append(self.syndromes(codewords[:, num_full * self.nsize:])[:, None, :])
+        return np.concatenate(parts, axis=1)
+
+    def _correct(self, chunk, syndromes):
+        # reedsolo's rs_correct_msg (errors only) starting from the table-computed
+        # syndromes, which are most of its cost in pure Python.
+        reedsolo.gf_log, reedsolo.gf_exp, reedsolo.field_charac = (
+            self._reference.gf_log, self._reference.gf_exp, self._reference.field_charac)
+        message = bytearray(chunk)
+        synd = [0] + syndromes.tolist()
+        forney = reedsolo.rs_forney_syndromes(synd, [], len(message), self.generator)
+        err_loc = reedsolo.rs_find_error_locator(forney, self.nsym, erase_count=0)
+        err_pos = reedsolo.rs_find_errors(err_loc[::-1], len(message), self.generator)
+        if err_pos is None:
+            raise ReedSolomonError("Could not locate error")
+        message = reedsolo.rs_correct_errata(message, synd, err_pos, self.fcr, self.generator)
+        if self.syndromes(np.frombuffer(bytes(message), dtype=np.uint8)[None, :]).any():
+            raise ReedSolomonError("Could not correct message")
+        return message[:-self.nsym], message[-self.nsym:], err_pos
+
+    def strip_parity(self, codewords):
+        codewords = np.asarray(codewords, dtype=np.uint8)
+        num_frames, encoded_size = codewords.shape
+        num_full, tail = self._layout(encoded_size)
+        body = codewords[:, :num_full * self.nsize].reshape(num_frames, num_full, self.nsize)
+        parts = [body[:, :, :self.chunk_size].reshape(num_frames, num_full * self.chunk_size)]
+        if tail:
+            start = num_full * self.nsize
+            parts.append(codewords[:, start:start + tail - self.nsym])
+        return np.concatenate(parts, axis=1)
+
+    def encode(self, data, nsym=None):
+        if nsym and nsym != self.nsym:
+            return self._reference.encode(data, nsym)
+        if isinstance(data, str):
+            data = bytearray(data, 'latin-1')
+        message = np.frombuffer(bytes(data), dtype=np.uint8)
+        return bytearray(self.encode_batch(message[None, :])[0].tobytes())
+
+    def decode(self, data, nsym=None, erase_pos=None, only_erasures=False):
+        if (nsym and nsym != self.nsym) or erase_pos or only_erasures or isinstance(data, str):
+            return self._reference.decode(data, nsym, erase_pos, only_erasures)
+        codeword = np.frombuffer(data, dtype=np.uint8)[None, :]
+        syndromes = self.chunk_syndromes(codeword)[0]
+        dirty = syndromes.any(axis=1)
+        if not dirty.any():
+            return bytearray(self.strip_parity(codeword)[0].tobytes()), bytearray(data), bytearray()
+        # Only the codewords with errors are corrected; the result is the same as
+        # reedsolo decoding the whole frame, which repairs one chunk at a time.
+        decoded, decoded_full, errata_pos = bytearray(), bytearray(), bytearray()
+        for index, start in enumerate(range(0, len(data), self.nsize)):
+            chunk = data[start:start + self.nsize]
+            if dirty[index]:
+                message, ecc, positions = self._correct(chunk, syndromes[index])
+                decoded += message
+                decoded_full += message + ecc
+                errata_pos += bytearray(positions)
+            else:
+                decoded += chunk[:-self.nsym]
+                decoded_full += chunk
+        return decoded, decoded_full, errata_pos
+
+    def check(self, data, nsym=None):
+        return self._reference.check(data, nsym)
+
+
+def cross_check(codec, reference, messages):
+    # True when both backends produce byte-identical codewords for every message.
+    for message in messages:
+        if bytes(codec.encode(message)) != bytes(reference.encode(message)):
+            return False
+    return True
@@ -0,0 +1,32 @@
+class Frame:
+    __slots__ = ('seq_num', 'data', 'crc')
+
+    def __init__(self, sequence_number, data, crc):
+        self.seq_num = sequence_number
+        self.data = data
+        self.crc = crc
+
+
+class FramePool:
+    # Free list of Frame records. A frame goes back to the pool once the receiver
+    # has read it or its transmission was lost, so a trial reuses a few records
+    # instead of allocating one per attempt.
+
+    def __init__(self):
+        self._free = []
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, sequence_number, data, crc):
+        if not self._free:
+            return Frame(sequence_number, data, crc)
+        frame = self._free.pop()
+        frame.seq_num = sequence_number
+        frame.data = data
+        frame.crc = crc
+        return frame
+
+    def release(self, frame):
+        frame.data = None
+        self._free.append(frame)
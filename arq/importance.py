@@ -0,0 +1,65 @@
+import math
+
+from arq.engine import PROPAGATION_DELAY, PROCESSING_DELAY, BANDWIDTH
+from arq.symbolic import codeword_layout, layout_size
+
+
+def check_rates(error_rate, importance_rate):
+    if not 0 < error_rate < 1 or not 0 < importance_rate < 1:
+        raise ValueError(f"Importance sampling needs rates in (0, 1), got {error_rate} and {importance_rate}")
+
+
+def log_likelihood_ratio(rate, biased_rate, failures, passes):
+    # log P(outcomes | rate) / P(outcomes | biased_rate) for independent Bernoulli
+    # trials that failed `failures` and passed `passes` times.
+    return failures * math.log(rate / biased_rate) + passes * (math.log1p(-rate) - math.log1p(-biased_rate))
+
+
+def reference_throughput(frame_size, rs_n, rs_k, propagation_delay=PROPAGATION_DELAY,
+                         processing_delay=PROCESSING_DELAY, bandwidth=BANDWIDTH):
+    # Throughput of a trial in which no frame fails.
+    frame_len = layout_size(codeword_layout(frame_size, rs_n, rs_n - rs_k))
+    return 1 / (frame_len / bandwidth + propagation_delay + processing_delay)
+
+
+def reweight(throughput, ber, weight, reference):
+    # The retransmission ratio is zero unless some frame failed, so ber * weight
+    # is the plain rare-event estimator. Throughput hardly moves at low error
+    # rates and weighting it directly would only add the variance of the weight;
+    # since E[weight] = 1, any constant reference can be used as a control variate.
+    return reference + (throughput - reference) * weight, ber * weight
+
+
+class ImportanceSampler:
+    # Runs the endpoints' fault coins at importance_rate instead of error_rate and
+    # counts their outcomes, so that the trial can be weighted back to error_rate.
+
+    def __init__(self, error_rate, importance_rate, endpoints):
+        check_rates(error_rate, importance_rate)
+        self.error_rate = error_rate
+        self.importance_rate = importance_rate
+        self.faults = 0
+        self.passes = 0
+        for endpoint in endpoints:
+            self._attach(endpoint)
+
+    def _attach(self, endpoint):
+        is_faulty = endpoint.is_faulty
+        endpoint.error_rate = self.importance_rate
+
+        def counted(frame):
+            faulty = is_faulty(frame)
+            if faulty:
+                self.faults += 1
+            else:
+                self.passes += 1
+            return faulty
+
+        endpoint.is_faulty = counted
+
+    @property
+    def weight(self):
+        return math.exp(log_likelihood_ratio(self.error_rate, self.importance_rate, self.faults, self.passes))
+
+    def reweight(self, throughput, ber, reference):
+        return reweight(throughput, ber, self.weight, reference)
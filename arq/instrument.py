@@ -0,0 +1,137 @@
+import time
+import collections
+
+# Attribute names the scripts use for the CRC function and the RS codec.
+CRC_ATTRS = ('crc_func', 'crc_function')
+CODEC_ATTRS = ('rs', 'reedSolomon')
+
+
+class _TimedCodec:
+    # Per-owner view of a shared codec, so timing one sender's encodes does not
+    # wrap the cached codec every other sender uses.
+
+    def __init__(self, codec, timed, methods):
+        self._codec = codec
+        for name, phase in methods.items():
+            if hasattr(codec, name):
+                setattr(self, name, timed(phase, getattr(codec, name)))
+
+    def __getattr__(self, name):
+        return getattr(self._codec, name)
+
+
+class PhaseProfiler:
+    # Accumulates perf_counter_ns time and call counts per phase for each sender,
+    # the receiver and the channel. Methods are wrapped on the instances only
+    # when a profiler is attached, so an unprofiled run pays nothing.
+    # create_frame and read_frame are inclusive of the phases they call;
+    # event_loop is whatever the total leaves after the top-level phases
+    # (sender scan, heap operations and bookkeeping).
+
+    def __init__(self):
+        self.time_ns = collections.defaultdict(int)
+        self.calls = collections.defaultdict(int)
+        self.num_senders = 0
+
+    def _timer(self, owner):
+        time_ns = self.time_ns
+        calls = self.calls
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(phase, fn):
+            key = (owner, phase)
+
+            def wrapper(*args, **kwargs):
+                start = perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    time_ns[key] += perf_counter_ns() - start
+                    calls[key] += 1
+            return wrapper
+        return timed
+
+    def _wrap(self, obj, timed, methods):
+        for name, phase in methods.items():
+            if hasattr(obj, name):
+                setattr(obj, name, timed(phase, getattr(obj, name)))
+
+    def attach(self, senders, receiver, channel=None, sim=None):
+        self.num_senders = len(senders)
+        for sender_id, sender in enumerate(senders):
+            timed = self._timer(sender_id)
+            payload = sender.payload
+            self._wrap(payload, timed, {'window': 'payload'})
+            if getattr(payload, 'codec', None) is not None:
+                payload.codec = _TimedCodec(payload.codec, timed, {'encode_batch': 'rs_encode', 'encode': 'rs_encode'})
+            self._wrap(sender, timed, dict.fromkeys(CRC_ATTRS, 'crc'))
+            self._wrap(sender, timed, {'create_frame': 'create_frame', 'is_faulty': 'fault_rng'})
+
+        timed = self._timer('receiver')
+        for name in CODEC_ATTRS:
+            if hasattr(receiver, name):
+                setattr(receiver, name, _TimedCodec(getattr(receiver, name), timed, {'decode': 'rs_decode'}))
+        self._wrap(receiver, timed, dict.fromkeys(CRC_ATTRS, 'crc'))
+        self._wrap(receiver, timed, {'read_frame': 'read_frame', 'is_faulty': 'fault_rng'})
+
+        if channel is not None:
+            self._wrap(channel, self._timer('channel'), {'corrupt': 'corrupt'})
+        if sim is not None:
+            self._wrap(sim, self._timer('simulation'), {'run': 'total'})
+
+    def _phases(self, owner):
+        return {phase: {'ns': self.time_ns[(key, phase)], 'calls': self.calls[(key, phase)]}
+                for key, phase in self.time_ns if key == owner}
+
+    def totals(self):
+        per_sender = [self._phases(sender_id) for sender_id in range(self.num_senders)]
+        senders = merge_phases(per_sender)
+        profile = {
+            'senders': senders,
+            'per_sender': per_sender,
+            'receiver': self._phases('receiver'),
+            'channel': self._phases('channel'),
+        }
+        total_ns = self.time_ns.get(('simulation', 'total'), 0)
+        if total_ns:
+            top_level = [senders.get('create_frame'), senders.get('fault_rng'),
+                         profile['receiver'].get('read_frame'), profile['channel'].get('corrupt')]
+            profile['total_ns'] = total_ns
+            profile['event_loop_ns'] = total_ns - sum(phase['ns'] for phase in top_level if phase)
+        return profile
+
+
+def merge_phases(phase_dicts):
+    merged = {}
+    for phases in phase_dicts:
+        for phase, counts in phases.items():
+            entry = merged.setdefault(phase, {'ns': 0, 'calls': 0})
+            entry['ns'] += counts['ns']
+            entry['calls'] += counts['calls']
+    return merged
+
+
+def merge_profiles(profiles):
+    # Sums trial profiles into one point profile; the per-sender breakdown is
+    # only kept on the trial records.
+    profiles = [profile for profile in profiles if profile]
+    if not profiles:
+        return None
+    merged = {owner: merge_phases(profile[owner] for profile in profiles)
+              for owner in ('senders', 'receiver', 'channel')}
+    for field in ('total_ns', 'event_loop_ns'):
+        merged[field] = sum(profile.get(field, 0) for profile in profiles)
+    return merged
+
+
+def summarize(profile):
+    if profile is None:
+        return 'no phases recorded'
+    total = profile.get('total_ns') or 1
+    parts = []
+    for owner in ('senders', 'receiver', 'channel'):
+        for phase, counts in profile[owner].items():
+            parts.append((counts['ns'], f"{owner}.{phase} {counts['ns'] / total:.0%} ({counts['calls']} calls)"))
+    if 'event_loop_ns' in profile:
+        parts.append((profile['event_loop_ns'], f"event_loop {profile['event_loop_ns'] / total:.0%}"))
+    return ', '.join(text for _, text in sorted(parts, reverse=True))
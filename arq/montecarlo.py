@@ -0,0 +1,118 @@
+import math
+import time
+
+import numpy as np
+
+from arq.channel import BIT_ERROR_RATE
+from arq.engine import PROPAGATION_DELAY, PROCESSING_DELAY, BANDWIDTH
+from arq.parallel import TrialResult, point_seed_sequence
+from arq.importance import check_rates, log_likelihood_ratio, reference_throughput, reweight
+from arq.symbolic import codeword_layout, layout_size
+from arq.topology import num_senders
+
+# run_simulation reduced to its random variables. Every delivered frame passes with
+# probability p = (1 - error_rate) * (1 - frame_loss), and every attempt before a
+# delivery is a sender fault with probability error_rate. The channel is
+# serialized, so the elapsed time is the sum of all attempt durations whatever
+# order the senders are served in:
+#   attempts * tx + sender_faults * timeout + deliveries * (propagation + processing)
+# GBN needs num_frames passes, so deliveries = num_frames + NegBin(num_frames, p).
+# SR never resends a frame the receiver lost: the first loss at delivery k stalls
+# the receive window at k, and the remaining num_frames - k passes have to arrive
+# within the next window_size - 1 deliveries. Otherwise the sender never finishes
+# (run_simulation would loop forever) and the trial is reported as NaN.
+# With importance_rate the counts are drawn at that rate and each trial is weighted
+# by the likelihood ratio of its sender coins and delivery outcomes.
+
+
+def binomial_cdf(k, n, p):
+    return sum(math.comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(min(k, n) + 1))
+
+
+def frame_loss_probability(frame_size, rs_n, rs_k, bit_error_rate=BIT_ERROR_RATE):
+    # Probability that some codeword of the frame has more than t symbol errors.
+    nsym = rs_n - rs_k
+    symbol_error = 1 - (1 - bit_error_rate) ** 8
+    correctable = 1.0
+    for length in codeword_layout(frame_size, rs_n, nsym):
+        correctable *= binomial_cdf(nsym // 2, length, symbol_error)
+    return 1 - correctable
+
+
+def _negative_binomial(rng, n, p, shape):
+    # Failures before the n-th success; p == 1 never fails.
+    if p >= 1:
+        return np.zeros(shape, dtype=np.int64)
+    return rng.negative_binomial(n, p, size=shape)
+
+
+def _deliveries(rng, protocol, num_frames, passing, window_size, shape):
+    if protocol == 'gbn':
+        return num_frames + _negative_binomial(rng, num_frames, passing, shape)
+
+    # Passes before the first loss; a frame lost at delivery k stalls the receiver at k.
+    if passing >= 1:
+        first_loss = np.full(shape, num_frames, dtype=np.int64)
+    else:
+        first_loss = rng.geometric(1 - passing, size=shape) - 1
+    stalled = first_loss < num_frames
+    remaining = np.where(stalled, num_frames - first_loss, 1)
+    extra = remaining + _negative_binomial(rng, remaining, passing, shape)
+    deliveries = np.where(stalled, first_loss + 1 + extra, num_frames)
+    deadlocked = stalled & (extra > window_size - 1)
+    return np.where(deadlocked, -1, deliveries)
+
+
+def simulate_point(topology, protocol, params, trials, rng,
+                   propagation_delay=PROPAGATION_DELAY, processing_delay=PROCESSING_DELAY, bandwidth=BANDWIDTH):
+    # Returns (throughput, ber) arrays with one entry per trial.
+    target_rate = params['error_rate']
+    importance_rate = params.get('importance_rate')
+    if importance_rate is not None:
+        check_rates(target_rate, importance_rate)
+    error_rate = target_rate if importance_rate is None else importance_rate
+    num_frames = params['num_frames']
+    bit_error_rate = params.get('bit_error_rate', BIT_ERROR_RATE)
+    nsym = params['rs_n'] - params['rs_k']
+    frame_len = layout_size(codeword_layout(params['frame_size'], params['rs_n'], nsym))
+    frame_loss = frame_loss_probability(params['frame_size'], params['rs_n'], params['rs_k'], bit_error_rate)
+    passing = (1 - error_rate) * (1 - frame_loss)
+    shape = (trials, num_senders(topology, params))
+
+    deliveries = _deliveries(rng, protocol, num_frames, passing, params.get('window_size'), shape)
+    deadlocked = (deliveries < 0).any(axis=1)
+    deliveries = np.maximum(deliveries, 0)
+    sender_faults = _negative_binomial(rng, np.maximum(deliveries, 1), 1 - error_rate, shape) * (deliveries > 0)
+    attempts = deliveries + sender_faults
+
+    elapsed = (attempts.sum(axis=1) * (frame_len / bandwidth) + sender_faults.sum(axis=1) * params['timeout']
+               + deliveries.sum(axis=1) * (propagation_delay + processing_delay))
+    total_attempts = attempts.sum(axis=1).astype(float)
+    elapsed[deadlocked] = np.nan
+    total_attempts[deadlocked] = np.nan
+    throughput = shape[1] * num_frames / elapsed
+    ber = sender_faults.sum(axis=1) / total_attempts
+    if importance_rate is not None:
+        # Every sender ends after num_frames passing deliveries, GBN and SR alike.
+        passes = shape[1] * num_frames
+        log_weight = (log_likelihood_ratio(target_rate, error_rate, sender_faults.sum(axis=1), deliveries.sum(axis=1))
+                      + log_likelihood_ratio(1 - (1 - target_rate) * (1 - frame_loss), 1 - passing,
+                                             deliveries.sum(axis=1) - passes, passes))
+        reference = reference_throughput(params['frame_size'], params['rs_n'], params['rs_k'],
+                                         propagation_delay, processing_delay, bandwidth)
+        throughput, ber = reweight(throughput, ber, np.exp(log_weight), reference)
+    return throughput, ber
+
+
+def simulate_points(topology, protocol, points, trials=25, seed=None):
+    # Runs a whole list of sweep points, yielding (params, [TrialResult...]) like
+    # run_trials. Each point draws from its own stream keyed by its parameters.
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    for params in points:
+        start = time.perf_counter()
+        rng = np.random.default_rng(point_seed_sequence(seed, params))
+        throughput, ber = simulate_point(topology, protocol, params, trials, rng)
+        wall_time = (time.perf_counter() - start) / trials
+        yield params, [TrialResult(trial, None, float(throughput[trial]), float(ber[trial]), wall_time)
+                       for trial in range(trials)]
@@ -0,0 +1,63 @@
+import importlib
+
+from arq import streams
+
+PAIR = ('gbn', 'sr')
+
+
+def per_sender_streams(seed, receiver, channel, num_senders):
+    # Gives the receiver's fault coin and the channel one stream per sender, so the
+    # k-th attempt of sender i sees the same draws whatever the other senders do.
+    # Sender coins and payloads are already per sender. Corruption moves into
+    # read_frame, right before the receiver reads the frame as deliver() did, so
+    # run_simulation should get no channel. Returns the per-sender channels.
+    coins = [streams.coin(streams.stream(seed, streams.RECEIVER, sender_id)) for sender_id in range(num_senders)]
+    channels = [type(channel)(channel.bit_error_rate, streams.generator(streams.stream(seed, streams.CHANNEL, sender_id)))
+                for sender_id in range(num_senders)]
+    read_frame = receiver.read_frame
+
+    def paired_read_frame(frame, sender_id):
+        receiver.random = coins[sender_id]
+        channels[sender_id].corrupt(frame)
+        return read_frame(frame, sender_id)
+
+    receiver.read_frame = paired_read_frame
+    return channels
+
+
+def _trial_fn(topology, protocol):
+    return importlib.import_module(f"{topology}.{protocol}_reed").run_trial
+
+
+def _accepted(run_trial):
+    # arq.trial builds on per_sender_streams, so it is imported on first use.
+    from arq.trial import trial_parameters
+    return trial_parameters(run_trial)
+
+
+def paired_trial(seed, topology, **params):
+    # Runs SR and GBN on the same trial seed with common random numbers and
+    # returns the SR - GBN differences in throughput, retransmission ratio and
+    # measured bit error rate.
+    outcomes = []
+    for protocol in PAIR:
+        run_trial = _trial_fn(topology, protocol)
+        accepted = _accepted(run_trial)
+        outcomes.append(run_trial(seed, common_random=True,
+                                  **{name: value for name, value in params.items() if name in accepted}))
+    gbn, sr = outcomes
+    return tuple(sr_value - gbn_value for gbn_value, sr_value in zip(gbn, sr))
+
+
+def pair_points(topology, points):
+    # Parameters either protocol accepts, tagged with the topology.
+    accepted = set()
+    for protocol in PAIR:
+        accepted.update(name for name in _accepted(_trial_fn(topology, protocol))
+                        if name not in ('seed', 'common_random'))
+    pairs = []
+    for point in points:
+        params = dict({name: point[name] for name in accepted if name in point}, topology=topology)
+        if params not in pairs:
+            pairs.append(params)
+    return pairs
@@ -0,0 +1,184 @@
+import os
+import json
+import math
+import time
+import zlib
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from arq.cache import point_key
+from arq.codec import warm_codecs
+from arq.stats import RunningStats, CONFIDENCE
+
+# cached is set on results served from a SweepCache rather than run.
+TrialResult = collections.namedtuple('TrialResult', ['trial', 'seed', 'throughput', 'ber', 'wall_time', 'profile',
+                                                     'channel_ber', 'cached'], defaults=(None, None, False))
+
+
+def point_seed_sequence(seed, params):
+    # Keyed by the point's parameters rather than its position in the sweep, so a
+    # point keeps its random streams when a range is extended or reordered.
+    key = zlib.crc32(json.dumps(params, sort_keys=True).encode())
+    return np.random.SeedSequence(seed, spawn_key=(key,))
+
+
+def trial_seeds(seed, params, trials):
+    children = point_seed_sequence(seed, params).spawn(trials)
+    return [int(child.generate_state(1, np.uint64)[0]) for child in children]
+
+
+def _run_task(task):
+    trial_fn, params, trial, trial_seed, profile = task
+    start = time.perf_counter()
+    if profile:
+        throughput, ber, channel_ber, phases = trial_fn(trial_seed, profile=True, **params)
+    else:
+        throughput, ber, channel_ber = trial_fn(trial_seed, **params)
+        phases = None
+    return TrialResult(trial, trial_seed, throughput, ber, time.perf_counter() - start, phases, channel_ber)
+
+
+def _codec_keys(points):
+    return sorted({(params['rs_n'] - params['rs_k'], params['rs_n']) for params in points if 'rs_n' in params})
+
+
+def _executor(workers, num_tasks, points):
+    if workers == 1 or num_tasks <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=min(workers, num_tasks),
+                               initializer=warm_codecs, initargs=(_codec_keys(points),))
+
+
+def run_trials(trial_fn, points, trials=25, seed=None, workers=None, cache=None, profile=False):
+    if seed is None:
+        # A fresh random seed can never be looked up again, so skip the cache.
+        seed = np.random.SeedSequence().entropy
+        cache = None
+    if profile:
+        # Phase timings belong to this run, not to the point, so never reuse them.
+        cache = None
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    keys = []
+    cached = []
+    tasks = []
+    for params in points:
+        key = point_key(trial_fn, params, seed, trials) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        keys.append(key)
+        cached.append([TrialResult(*result)._replace(cached=True) for result in hit] if hit is not None else None)
+        if hit is None:
+            for trial, trial_seed in enumerate(trial_seeds(seed, params, trials)):
+                tasks.append((trial_fn, params, trial, trial_seed, profile))
+
+    executor = _executor(workers, len(tasks), points)
+    if executor is None:
+        results = map(_run_task, tasks)
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        results = executor.map(_run_task, tasks, chunksize=chunksize)
+
+    try:
+        for params, key, point_results in zip(points, keys, cached):
+            if point_results is None:
+                point_results = [next(results) for _ in range(trials)]
+                if cache is not None:
+                    cache.put(key, params, point_results)
+            yield params, point_results
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def stalled(result):
+    # An SR trial that can never finish reports NaN instead of a throughput.
+    return math.isnan(result.throughput)
+
+
+def finished_stats(results):
+    # Throughput and retransmission ratio stats over the trials that finished,
+    # and the number of trials that stalled.
+    finished = [result for result in results if not stalled(result)]
+    return (RunningStats(result.throughput for result in finished), RunningStats(result.ber for result in finished),
+            len(results) - len(finished))
+
+
+def _settled(stats, done, min_trials, max_trials, target, confidence):
+    # Stalled trials count against the budget but never enter stats. A point
+    # whose first min_trials all stalled has no interval to narrow, so it stops.
+    if done >= max_trials:
+        return True
+    if done >= min_trials and stats.count == 0:
+        return True
+    return stats.count >= min_trials and stats.relative_half_width(confidence) <= target
+
+
+def run_adaptive(trial_fn, points, min_trials=5, max_trials=200, target=0.05, confidence=CONFIDENCE,
+                 seed=None, workers=None, cache=None, profile=False):
+    # Sequential version of run_trials: every point runs min_trials, then more in
+    # rounds until the confidence interval of its mean throughput is within
+    # target (relative half-width) or max_trials is spent. Each round asks for the
+    # trials the current spread says are missing, at most doubling the count so
+    # a noisy early estimate cannot overshoot by much. The interval only covers
+    # trials that finished; the request is scaled up by the fraction that stalled.
+    # Trial i of a point always gets the same seed, so the outcome does not
+    # depend on the number of workers.
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        cache = None
+    if profile:
+        cache = None
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rule = {'min_trials': min_trials, 'max_trials': max_trials, 'target': target, 'confidence': confidence}
+
+    keys = [point_key(trial_fn, params, seed, rule) if cache is not None else None for params in points]
+    results = []
+    for key in keys:
+        hit = cache.get(key) if cache is not None else None
+        results.append([TrialResult(*result)._replace(cached=True) for result in hit] if hit is not None else None)
+    pending = [i for i, point_results in enumerate(results) if point_results is None]
+    stats = {i: RunningStats() for i in pending}
+    seeds = {i: trial_seeds(seed, points[i], max_trials) for i in pending}
+    for i in pending:
+        results[i] = []
+
+    executor = _executor(workers, len(pending) * max_trials, points)
+    next_point = 0
+    try:
+        while True:
+            while next_point < len(points) and next_point not in pending:
+                yield points[next_point], results[next_point]
+                next_point += 1
+            if not pending:
+                break
+
+            tasks = []
+            owners = []
+            for i in pending:
+                done = len(results[i])
+                if done == 0:
+                    wanted = min_trials
+                else:
+                    missing = stats[i].trials_needed(target, confidence) - stats[i].count
+                    wanted = min(max(math.ceil(missing * done / max(stats[i].count, 1)), 1), done)
+                wanted = min(wanted, max_trials - done)
+                tasks.extend((trial_fn, points[i], trial, seeds[i][trial], profile) for trial in range(done, done + wanted))
+                owners.extend([i] * wanted)
+            outputs = map(_run_task, tasks) if executor is None else executor.map(_run_task, tasks)
+            for i, result in zip(owners, outputs):
+                results[i].append(result)
+                if not stalled(result):
+                    stats[i].add(result.throughput)
+
+            for i in list(pending):
+                if _settled(stats[i], len(results[i]), min_trials, max_trials, target, confidence):
+                    pending.remove(i)
+                    if cache is not None:
+                        cache.put(keys[i], points[i], results[i])
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,66 @@
+import numpy as np
+
+PREFETCH_FRAMES = 64
+
+
+class PayloadSource:
+    # Payloads (and their parity, when a codec is given) are generated a window at
+    # a time into a ring preallocated per sender. Frames are memoryview slices of
+    # that ring, so the channel corrupts and the receiver checks the sender's bytes
+    # in place. A slot is only rewritten once the whole window has been handed out,
+    # long after the single in-flight frame that used it was read.
+
+    def __init__(self, frame_size, rng=None, prefetch=PREFETCH_FRAMES, codec=None):
+        if rng is None:
+            rng = np.random.default_rng()
+        self.frame_size = frame_size
+        self.codec = codec
+        self.rng = rng
+        self.prefetch = prefetch
+        self._ring = None
+        self._window = None
+        self._next = 0
+
+    def window(self, num_frames):
+        data = self.rng.bytes(num_frames * self.frame_size)
+        return np.frombuffer(data, dtype=np.uint8).reshape(num_frames, self.frame_size)
+
+    def encoded_window(self, num_frames, out=None):
+        window = self.window(num_frames)
+        if hasattr(self.codec, 'encode_batch'):
+            return self.codec.encode_batch(window, out=out)
+        return [self.codec.encode(bytearray(row)) for row in window]
+
+    def _ring_for(self, num_frames, frame_len):
+        if self._ring is None or self._ring.shape != (num_frames, frame_len):
+            self._ring = np.empty((num_frames, frame_len), dtype=np.uint8)
+        return self._ring
+
+    def _fill_plain(self, num_frames):
+        window = self.window(num_frames)
+        ring = self._ring_for(num_frames, self.frame_size)
+        ring[...] = window
+        return ring
+
+    def _fill_encoded(self, num_frames):
+        if not hasattr(self.codec, 'encode_batch'):
+            # Byte-oriented codecs return a fresh bytearray per frame already.
+            return self.encoded_window(num_frames)
+        encoded_size = self.codec.encoded_size(self.frame_size)
+        return self.encoded_window(num_frames, out=self._ring_for(num_frames, encoded_size))
+
+    def frame(self):
+        return self._take(self._fill_plain)
+
+    def encoded_frame(self):
+        return self._take(self._fill_encoded)
+
+    def _take(self, fill):
+        if self._window is None or self._next == len(self._window):
+            self._window = fill(self.prefetch)
+            self._next = 0
+        data = self._window[self._next]
+        self._next += 1
+        if isinstance(data, np.ndarray):
+            return memoryview(data)
+        return data
@@ -0,0 +1,31 @@
+class ReorderBuffer:
+    # Receive window for one sender. Tracks which sequence numbers have arrived in
+    # a bitmap indexed by seq_num % window_size; frame payloads are never kept.
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self._present = bytearray(window_size)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, seq_num):
+        return bool(self._present[seq_num % self.window_size])
+
+    def add(self, seq_num):
+        slot = seq_num % self.window_size
+        if not self._present[slot]:
+            self._present[slot] = 1
+            self._count += 1
+
+    def deliver(self, expected_seq_num):
+        # Releases the run of consecutive frames starting at expected_seq_num and
+        # returns the next sequence number still missing.
+        slot = expected_seq_num % self.window_size
+        while self._present[slot]:
+            self._present[slot] = 0
+            self._count -= 1
+            expected_seq_num += 1
+            slot = (slot + 1) % self.window_size
+        return expected_seq_num
@@ -0,0 +1,171 @@
+import os
+import csv
+import json
+
+from arq.instrument import merge_profiles
+from arq.parallel import finished_stats
+from arq.stats import RunningStats
+
+FIELDS = [
+    'kind', 'topology', 'protocol', 'error_rate', 'frame_size', 'num_frames', 'num_nodes',
+    'num_rows', 'num_cols', 'window_size', 'rs_n', 'rs_k', 'timeout', 'bit_error_rate', 'order', 'fec_mode',
+    'importance_rate', 'transport', 'net_loss', 'net_delay', 'seed', 'trial', 'trials', 'stalled',
+    'throughput', 'throughput_std', 'throughput_ci', 'ber', 'ber_std', 'ber_ci', 'channel_ber', 'wall_time',
+    'relative_error', 'profile',
+]
+STRING_FIELDS = ('kind', 'topology', 'protocol', 'order', 'fec_mode', 'transport')
+INTEGER_FIELDS = ('trial', 'trials', 'stalled', 'frame_size', 'num_frames', 'num_nodes', 'num_rows', 'num_cols',
+                  'window_size', 'rs_n', 'rs_k')
+FORMATS = {
+    '.jsonl': 'jsonl',
+    '.json': 'jsonl',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+}
+
+
+class ResultsWriter:
+    # Appends one record per trial and one per sweep point, in every format, so a
+    # resumed sweep adds to the file of the interrupted one. Records are buffered
+    # and flushed in batches so a sweep never holds all of its results in memory.
+
+    def __init__(self, path, fmt=None, buffer_size=1000):
+        if fmt is None:
+            fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt not in FORMATS.values():
+            raise ValueError(f"Unknown results format for {path}: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._arrow_writer = None
+        self._arrow_schema = None
+        self._partial = None
+        if fmt in ('parquet', 'arrow'):
+            try:
+                import pyarrow
+            except ImportError:
+                raise ImportError(f"Writing {fmt} results requires pyarrow") from None
+            self._open_arrow()
+        elif fmt == 'csv' and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline='') as f:
+                if next(csv.reader(f), None) != FIELDS:
+                    raise ValueError(f"{path} holds records with other fields; write to a new file")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_point(self, topology, protocol, params, results, seed=None, **extra):
+        base = dict(params, topology=topology, protocol=protocol)
+        for result in results:
+            record = dict(base, kind='trial', trial=result.trial, seed=result.seed,
+                          throughput=result.throughput, ber=result.ber, channel_ber=result.channel_ber,
+                          wall_time=result.wall_time)
+            if result.profile is not None:
+                record['profile'] = result.profile
+            self.write(record)
+
+        # Stalled SR trials are counted, the statistics cover the trials that finished.
+        throughputs, bers, stalled = finished_stats(results)
+        finished = throughputs.count
+        channel_bers = RunningStats(result.channel_ber for result in results if result.channel_ber is not None)
+        record = dict(base, kind='point', seed=seed, trials=len(results), stalled=stalled,
+                      throughput=throughputs.mean if finished else None, throughput_std=throughputs.stdev,
+                      throughput_ci=throughputs.half_width() if finished > 1 else None,
+                      ber=bers.mean if finished else None, ber_std=bers.stdev,
+                      ber_ci=bers.half_width() if finished > 1 else None,
+                      channel_ber=channel_bers.mean if channel_bers.count else None,
+                      wall_time=sum(result.wall_time for result in results), **extra)
+        profile = merge_profiles(result.profile for result in results)
+        if profile is not None:
+            record['profile'] = profile
+        self.write(record)
+
+    def write_prediction(self, topology, protocol, params, prediction):
+        self.write(dict(params, topology=topology, protocol=protocol, kind='model',
+                        throughput=prediction.throughput, ber=prediction.ber,
+                        relative_error=prediction.relative_error))
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self.fmt == 'jsonl':
+            with open(self.path, 'a') as f:
+                for record in self._buffer:
+                    f.write(json.dumps(record) + '\n')
+        elif self.fmt == 'csv':
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+                if new_file:
+                    writer.writeheader()
+                for record in self._buffer:
+                    writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                                     for key, value in record.items()})
+        else:
+            self._write_arrow()
+        self._buffer = []
+
+    def _write_arrow(self):
+        import pyarrow as pa
+
+        columns = {field: [record.get(field) for record in self._buffer] for field in FIELDS}
+        columns['profile'] = [json.dumps(profile) if profile is not None else None for profile in columns['profile']]
+        self._arrow_writer.write_table(pa.Table.from_pydict(columns, schema=self._arrow_schema))
+
+    def _open_arrow(self):
+        # Parquet and Arrow files cannot grow in place: the batches of an existing
+        # file are streamed into a new one, which replaces it on close.
+        import pyarrow as pa
+
+        self._arrow_schema = pa.schema([(field, _arrow_type(pa, field)) for field in FIELDS])
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+        existing = None
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            if self.fmt == 'parquet':
+                existing = pq.ParquetFile(self.path)
+                schema, batches = existing.schema_arrow, existing.iter_batches()
+            else:
+                existing = pa.ipc.open_file(self.path)
+                schema = existing.schema
+                batches = (existing.get_batch(i) for i in range(existing.num_record_batches))
+            if not schema.equals(self._arrow_schema):
+                raise ValueError(f"{self.path} holds records with other fields; write to a new file")
+            self._partial = self.path + '.partial'
+        target = self._partial or self.path
+        if self.fmt == 'parquet':
+            self._arrow_writer = pq.ParquetWriter(target, self._arrow_schema)
+        else:
+            self._arrow_writer = pa.ipc.new_file(target, self._arrow_schema)
+        if existing is not None:
+            for batch in batches:
+                self._arrow_writer.write_table(pa.Table.from_batches([batch], schema=self._arrow_schema))
+
+    def close(self):
+        self.flush()
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            self._arrow_writer = None
+        if self._partial is not None:
+            os.replace(self._partial, self.path)
+            self._partial = None
+
+
+def _arrow_type(pa, field):
+    if field in STRING_FIELDS or field == 'profile':
+        return pa.string()
+    if field == 'seed':
+        return pa.uint64()
+    if field in INTEGER_FIELDS:
+        return pa.int64()
+    return pa.float64()
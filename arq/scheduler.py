@@ -0,0 +1,121 @@
+import numpy as np
+
+SERVICE_ORDER = 'round_robin'
+
+
+class RoundRobinScheduler:
+    # Keeps the unfinished senders in a circular linked list, so finding the next
+    # sender after a turn costs O(1) however many senders have already finished.
+
+    def __init__(self, num_senders, num_frames, rng=None):
+        self.num_senders = num_senders
+        self.remaining = [num_frames] * num_senders
+        self.completed = 0 if num_frames > 0 else num_senders
+        self._next = [(sender_id + 1) % num_senders for sender_id in range(num_senders)]
+        self._prev = [(sender_id - 1) % num_senders for sender_id in range(num_senders)]
+
+    def __len__(self):
+        return self.num_senders - self.completed
+
+    def acked(self, sender_id):
+        self.remaining[sender_id] -= 1
+        if self.remaining[sender_id] == 0:
+            self.completed += 1
+            self._remove(sender_id)
+
+    def _remove(self, sender_id):
+        # The finished sender keeps its own pointer, so next(sender_id) still
+        # continues from where it left the ring.
+        prev, following = self._prev[sender_id], self._next[sender_id]
+        self._next[prev] = following
+        self._prev[following] = prev
+
+    def next(self, after):
+        if self.completed == self.num_senders:
+            return None
+        candidate = self._next[after]
+        while self.remaining[candidate] <= 0:
+            candidate = self._next[candidate]
+        return candidate
+
+
+class RandomScheduler(RoundRobinScheduler):
+    # Uniform choice among the unfinished senders; removal swaps with the last slot.
+
+    def __init__(self, num_senders, num_frames, rng=None):
+        super().__init__(num_senders, num_frames)
+        if rng is None:
+            rng = np.random.default_rng()
+        self.rng = rng
+        self._active = list(range(num_senders)) if num_frames > 0 else []
+        self._position = list(range(num_senders))
+
+    def _remove(self, sender_id):
+        position = self._position[sender_id]
+        last = self._active.pop()
+        if last != sender_id:
+            self._active[position] = last
+            self._position[last] = position
+
+    def next(self, after):
+        if not self._active:
+            return None
+        return self._active[int(self.rng.integers(len(self._active)))]
+
+
+class WeightedScheduler(RoundRobinScheduler):
+    # Picks a sender with probability proportional to the frames it still has to
+    # deliver. The weights live in a Fenwick tree: O(log n) per draw and per ack.
+
+    def __init__(self, num_senders, num_frames, rng=None):
+        super().__init__(num_senders, num_frames)
+        if rng is None:
+            rng = np.random.default_rng()
+        self.rng = rng
+        self._tree = [0] * (num_senders + 1)
+        self._total = 0
+        for sender_id in range(num_senders):
+            self._add(sender_id, max(num_frames, 0))
+        self._top = 1 << max(num_senders.bit_length() - 1, 0)
+
+    def _add(self, sender_id, delta):
+        self._total += delta
+        index = sender_id + 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def acked(self, sender_id):
+        super().acked(sender_id)
+        self._add(sender_id, -1)
+
+    def _remove(self, sender_id):
+        pass
+
+    def next(self, after):
+        if self._total <= 0:
+            return None
+        target = int(self.rng.integers(self._total))
+        index = 0
+        step = self._top
+        while step:
+            if index + step < len(self._tree) and self._tree[index + step] <= target:
+                index += step
+                target -= self._tree[index]
+            step >>= 1
+        return index
+
+
+SCHEDULERS = {
+    'round_robin': RoundRobinScheduler,
+    'random': RandomScheduler,
+    'weighted': WeightedScheduler,
+}
+
+
+def get_scheduler(order, num_senders, num_frames, rng=None):
+    try:
+        scheduler = SCHEDULERS[order]
+    except KeyError:
+        raise ValueError(f"Unknown service order: {order}") from None
+    return scheduler(num_senders, num_frames, rng)
@@ -0,0 +1,103 @@
+import math
+import functools
+
+CONFIDENCE = 0.95
+
+
+def _beta_fraction(a, b, x):
+    # Continued fraction for the regularized incomplete beta function (modified Lentz).
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        numerator = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        for step in (numerator, -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + step * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + step / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1) < 1e-15:
+            break
+    return result
+
+
+def incomplete_beta(a, b, x):
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _beta_fraction(a, b, x) / a
+    return 1 - front * _beta_fraction(b, a, 1 - x) / b
+
+
+def t_cdf(t, df):
+    tail = 0.5 * incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return 1 - tail if t > 0 else tail
+
+
+@functools.lru_cache(maxsize=None)
+def t_quantile(q, df):
+    # Inverse of t_cdf by bisection; only the upper half is needed for intervals.
+    if q < 0.5:
+        return -t_quantile(1 - q, df)
+    low, high = 0.0, 1.0
+    while t_cdf(high, df) < q:
+        low, high = high, high * 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if t_cdf(middle, df) < q:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class RunningStats:
+    # Welford's streaming mean and variance, with a Student-t confidence interval.
+
+    def __init__(self, values=()):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence=CONFIDENCE):
+        if self.count < 2:
+            return math.inf
+        return t_quantile((1 + confidence) / 2, self.count - 1) * self.stdev / math.sqrt(self.count)
+
+    def interval(self, confidence=CONFIDENCE):
+        half = self.half_width(confidence)
+        return self.mean - half, self.mean + half
+
+    def relative_half_width(self, confidence=CONFIDENCE):
+        if self.mean == 0:
+            return math.inf if self.variance else 0.0
+        return self.half_width(confidence) / abs(self.mean)
+
+    def trials_needed(self, target, confidence=CONFIDENCE):
+        # Trials for the relative half-width to reach target if the spread holds.
+        if self.count < 2 or self.mean == 0:
+            return self.count + 1
+        t = t_quantile((1 + confidence) / 2, self.count - 1)
+        return math.ceil((t * self.stdev / (target * abs(self.mean))) ** 2)
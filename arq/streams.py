@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+
+# Roles in a trial's spawn keys. Every endpoint draws from its own stream keyed by
+# (role, index) under the trial seed, so adding a sender or reordering the setup
+# never shifts anyone else's randomness.
+SENDER = 0
+RECEIVER = 1
+CHANNEL = 2
+SCHEDULER = 3
+NETWORK = 4
+
+# Children of an endpoint's stream.
+COIN = 0
+PAYLOAD = 1
+
+
+def stream(seed, role, index=0):
+    return np.random.SeedSequence(seed, spawn_key=(role, index))
+
+
+def child(seed_seq, key):
+    if seed_seq is None:
+        return None
+    return np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (key,))
+
+
+def generator(seed_seq=None):
+    # numpy Generator for bulk draws; fresh OS entropy when no stream is given.
+    return np.random.default_rng(seed_seq)
+
+
+def coin(seed_seq=None):
+    # random.Random for the per-frame fault coin flips, which are one scalar at a
+    # time and several times cheaper from the stdlib generator than from numpy.
+    if seed_seq is None:
+        return random.Random()
+    return random.Random(int.from_bytes(seed_seq.generate_state(4, np.uint64).tobytes(), 'little'))
@@ -0,0 +1,167 @@
+import numpy as np
+from reedsolo import ReedSolomonError
+
+from arq.channel import BIT_ERROR_RATE, MASK_WINDOW, BitErrorChannel
+from arq.codec import get_codec
+from arq.instrument import CRC_ATTRS, CODEC_ATTRS
+
+FEC_MODES = ('bytes', 'symbolic')
+FEC_MODE = 'bytes'
+
+
+class SymbolicCodeword:
+    # Stands in for an RS-encoded frame: only its length and the number of symbol
+    # errors in each of its codewords are tracked, never its bytes.
+    __slots__ = ('layout', 'errors')
+
+    def __init__(self, layout, errors=None):
+        self.layout = layout
+        self.errors = errors
+
+    def __len__(self):
+        return layout_size(self.layout)
+
+
+def codeword_layout(frame_size, nsize, nsym):
+    # Lengths of the codewords a frame_size-byte message is split into.
+    chunk_size = nsize - nsym
+    num_full, tail = divmod(frame_size, chunk_size)
+    return (nsize,) * num_full + ((tail + nsym,) if tail else ())
+
+
+def layout_size(layout):
+    return sum(layout)
+
+
+def symbolic_crc(data):
+    # An ideal frame check: it catches every corrupted frame. CRC-16 misses about
+    # one in 65536 corrupted frames, which the real path would count as delivered.
+    return 0 if data.errors is None or not data.errors.any() else 1
+
+
+class SymbolicRSCodec:
+    # Decides decodability from the RS bound alone: a codeword with at most
+    # t = nsym // 2 symbol errors is corrected, anything worse is lost (reedsolo
+    # either gives up or miscorrects, and the CRC then rejects the frame).
+
+    def __init__(self, nsym, nsize=255):
+        self.nsym = nsym
+        self.nsize = nsize
+        self.t = nsym // 2
+
+    def decode(self, data):
+        if data.errors is not None and (data.errors > self.t).any():
+            raise ReedSolomonError("Too many errors to correct")
+        return data, SymbolicCodeword(data.layout), bytearray()
+
+
+class SymbolicPayload:
+    def __init__(self, frame_size, nsize, nsym):
+        self.frame_size = frame_size
+        self.layout = codeword_layout(frame_size, nsize, nsym)
+
+    def encoded_frame(self):
+        return SymbolicCodeword(self.layout)
+
+
+class SymbolicChannel(BitErrorChannel):
+    # Same independent bit flips as BitErrorChannel, counted per codeword instead
+    # of applied to bytes. Bit error counts are drawn in bulk for a window of
+    # frames; only codewords with several flips place them, to count how many
+    # distinct symbols they hit.
+
+    def __init__(self, bit_error_rate=BIT_ERROR_RATE, rng=None, window=MASK_WINDOW):
+        super().__init__(bit_error_rate, rng, window)
+        self._layout = None
+        self._bits = None
+
+    def _draw_errors(self, layout):
+        self._layout = layout
+        sizes = np.array(layout, dtype=np.int64)
+        self._bits = self.rng.binomial(sizes * 8, self.bit_error_rate, size=(self.window, len(layout)))
+        self._next = 0
+
+    def corrupt(self, frame):
+        layout = frame.data.layout
+        if self._bits is None or self._next == self.window or self._layout != layout:
+            self._draw_errors(layout)
+        bits = self._bits[self._next]
+        self._next += 1
+        flips = int(bits.sum())
+        errors = bits
+        if flips > 1:
+            errors = bits.copy()
+            for index in np.flatnonzero(bits > 1):
+                positions = self.rng.choice(layout[index] * 8, size=bits[index], replace=False)
+                errors[index] = len(np.unique(positions >> 3))
+        frame.data.errors = errors
+        self.bits_sent += layout_size(layout) * 8
+        self.bit_errors += flips
+        return flips
+
+
+def _set(obj, names, value):
+    for name in names:
+        if hasattr(obj, name):
+            setattr(obj, name, value)
+
+
+def prepare_fec(fec_mode, bit_error_rate, senders, receiver, rs_n, rs_k, rng=None):
+    # Returns the channel for a trial. In symbolic mode the endpoints built for the
+    # byte path are switched to symbolic payloads, frame check and codec first.
+    if fec_mode not in FEC_MODES:
+        raise ValueError(f"Unknown FEC mode: {fec_mode}")
+    if fec_mode == 'bytes':
+        return BitErrorChannel(bit_error_rate, rng)
+
+    codec = SymbolicRSCodec(rs_n - rs_k, rs_n)
+    for sender in senders:
+        sender.payload = SymbolicPayload(sender.frame_size, rs_n, rs_n - rs_k)
+        _set(sender, CRC_ATTRS, symbolic_crc)
+    _set(receiver, CRC_ATTRS, symbolic_crc)
+    _set(receiver, CODEC_ATTRS, codec)
+    return SymbolicChannel(bit_error_rate, rng)
+
+
+def cross_validate(frame_size, rs_n, rs_k, bit_error_rate, num_frames=1000, rng=None):
+    # Corrupts real encoded frames with BitErrorChannel masks and compares, frame
+    # by frame, whether the real receiver path (CRC, then RS decode, then CRC)
+    # accepts each frame with what the symbolic codec decides from the symbol
+    # error counts of the same mask. Returns (frames, disagreements, accepted).
+    from arq.codec import get_crc_function
+    from arq.frames import Frame
+    from arq.payload import PayloadSource
+
+    if rng is None:
+        rng = np.random.default_rng()
+    nsym = rs_n - rs_k
+    codec = get_codec(nsym, rs_n)
+    crc = get_crc_function()
+    symbolic = SymbolicRSCodec(nsym, rs_n)
+    layout = codeword_layout(frame_size, rs_n, nsym)
+    bounds = np.cumsum((0,) + layout)
+    payload = PayloadSource(frame_size, rng=rng, codec=codec)
+    channel = BitErrorChannel(bit_error_rate, rng=rng)
+
+    disagreements = accepted = 0
+    for _ in range(num_frames):
+        data = payload.encoded_frame()
+        frame = Frame(0, data, crc(data))
+        channel.corrupt(frame)
+        mask = channel._masks[channel._next - 1]
+        errors = np.array([np.count_nonzero(mask[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])])
+
+        real = crc(frame.data) == frame.crc
+        if not real:
+            try:
+                real = crc(codec.decode(frame.data)[1]) == frame.crc
+            except ReedSolomonError:
+                real = False
+        try:
+            symbolic.decode(SymbolicCodeword(layout, errors))
+            predicted = True
+        except ReedSolomonError:
+            predicted = False
+        disagreements += real != predicted
+        accepted += real
+    return num_frames, disagreements, accepted
@@ -0,0 +1,53 @@
+import collections
+import functools
+
+import networkx as nx
+
+Topology = collections.namedtuple('Topology', ['kind', 'size', 'graph', 'center', 'sender_nodes', 'routes'])
+
+
+def _bus(num_nodes):
+    G = nx.path_graph(num_nodes - 1)
+    return G, list(G.nodes)
+
+
+def _star(num_nodes):
+    G = nx.star_graph(num_nodes)
+    return G, list(G.nodes)[:num_nodes]
+
+
+def _mesh(num_nodes):
+    G = nx.complete_graph(num_nodes)
+    return G, list(G.nodes)
+
+
+def _grid(num_rows, num_cols):
+    G = nx.grid_2d_graph(num_rows, num_cols)
+    center = nx.center(G)[0]
+    return G, [node for node in G.nodes if node != center]
+
+
+# Each builder returns the graph and the nodes whose senders take part in
+# run_simulation, in sender_id order, matching the sender counts the scripts use.
+BUILDERS = {
+    'bus': _bus,
+    'star': _star,
+    'mesh': _mesh,
+    'grid': _grid,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_topology(kind, *size):
+    if kind not in BUILDERS:
+        raise ValueError(f"Unknown topology: {kind}")
+    G, sender_nodes = BUILDERS[kind](*size)
+    center = nx.center(G)[0]
+    routes = nx.shortest_path(G, target=center)
+    return Topology(kind, size, nx.freeze(G), center, tuple(sender_nodes), routes)
+
+
+def num_senders(kind, params):
+    if kind == 'grid':
+        return len(get_topology(kind, params['num_rows'], params['num_cols']).sender_nodes)
+    return len(get_topology(kind, params['num_nodes']).sender_nodes)
@@ -0,0 +1,314 @@
+import socket
+import asyncio
+import struct
+
+from arq import streams
+from arq.frames import Frame
+from arq.symbolic import SymbolicChannel
+
+TRANSPORTS = ('sim', 'udp')
+TRANSPORT = 'sim'
+HOST = '127.0.0.1'
+WINDOW_SIZE = 8  # GBN senders have no window of their own
+BATCH_BYTES = 16384
+# A full SR window of every sender can arrive at once; the default receive buffer
+# drops most of it.
+SOCKET_BUFFER = 1 << 22
+
+# Datagrams start with a kind byte. A DATA datagram carries one or more frames of
+# one sender as (sender_id, seq_num, crc, length) records followed by the bytes;
+# a REPLY carries the receiver's next expected sequence number for that sender and
+# an ACK or NACK entry per frame of the datagram it answers.
+DATA = 0
+REPLY = 1
+NACK = 0
+ACK = 1
+KIND = struct.Struct('!B')
+RECORD = struct.Struct('!HIHH')
+REPLY_HEADER = struct.Struct('!HI')
+ENTRY = struct.Struct('!BI')
+
+
+def use_udp(transport):
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport}")
+    return transport == 'udp'
+
+
+def open_socket(address=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+    sock.setblocking(False)
+    sock.bind((HOST, 0))
+    if address is not None:
+        sock.connect(address)
+    return sock
+
+
+class Impairment:
+    # In-process stand-in for netem: drops each datagram with probability loss and
+    # holds the others back for delay +/- jitter seconds, which can reorder them.
+
+    def __init__(self, loss=0.0, delay=0.0, jitter=0.0, rng=None):
+        if not 0 <= loss < 1:
+            raise ValueError(f"Datagram loss must be in [0, 1), got {loss}")
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = rng if rng is not None else streams.coin()
+        self.dropped = 0
+        self._pending = set()
+
+    def send(self, transport, data, addr=None):
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.delay
+        if self.jitter:
+            delay = max(0.0, delay + self.jitter * (2 * self.rng.random() - 1))
+        if delay <= 0:
+            transport.sendto(data, addr)
+            return
+
+        def release():
+            self._pending.discard(handle)
+            if not transport.is_closing():
+                transport.sendto(data, addr)
+
+        handle = asyncio.get_running_loop().call_later(delay, release)
+        self._pending.add(handle)
+
+    def close(self):
+        for handle in self._pending:
+            handle.cancel()
+        self._pending.clear()
+
+
+class ReceiverEndpoint(asyncio.DatagramProtocol):
+    def __init__(self, receiver, channel, impairment):
+        self.receiver = receiver
+        self.channel = channel
+        self.impairment = impairment
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data[0] != DATA:
+            return
+        entries = []
+        offset = KIND.size
+        while offset < len(data):
+            sender_id, seq_num, crc, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            frame = Frame(seq_num, bytearray(data[offset:offset + length]), crc)
+            offset += length
+            entries.append(ENTRY.pack(self.read(frame, sender_id), seq_num))
+        reply = KIND.pack(REPLY) + REPLY_HEADER.pack(sender_id, self.receiver.expected_seq_num[sender_id])
+        self.impairment.send(self.transport, reply + b''.join(entries), addr)
+
+    def read(self, frame, sender_id):
+        if frame.seq_num < self.receiver.expected_seq_num[sender_id]:
+            # A copy of a frame that was already delivered, whose ACK got lost.
+            return ACK
+        if self.channel is not None:
+            self.channel.corrupt(frame)
+        result = self.receiver.read_frame(frame, sender_id)
+        accepted = result[0] if isinstance(result, tuple) else result
+        return ACK if accepted else NACK
+
+
+class SenderEndpoint(asyncio.DatagramProtocol):
+    # Sliding window over one connected UDP socket with a timer per frame in
+    # flight. GBN goes back to the oldest unacknowledged frame when its timer
+    # expires or it is NACKed; SR resends only the frame concerned. A frame the
+    # sender's fault coin rejects is never put on the wire and waits for its timer.
+
+    def __init__(self, sender_id, sender, num_frames, timeout, selective, impairment, done):
+        self.sender_id = sender_id
+        self.sender = sender
+        self.num_frames = num_frames
+        self.timeout = timeout
+        self.selective = selective
+        self.impairment = impairment
+        self.done = done
+        self.window_size = getattr(sender, 'window_size', WINDOW_SIZE)
+        self.base = 0
+        self.next_seq = 0
+        self.highest = 0
+        self.acked = set()
+        self.timers = {}
+        self.outbox = []
+        self.outbox_bytes = 0
+        self.flush_handle = None
+        self.sent = 0
+        self.resent = 0
+        self.transport = None
+        self.loop = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+        self.fill()
+
+    def fill(self):
+        while self.next_seq < min(self.base + self.window_size, self.num_frames):
+            if self.next_seq not in self.acked:
+                self.send(self.next_seq)
+            self.next_seq += 1
+
+    def send(self, seq_num):
+        frame = self.sender.create_frame(seq_num)
+        self.sent += 1
+        if seq_num < self.highest:
+            self.resent += 1
+        else:
+            self.highest = seq_num + 1
+        if not self.sender.is_faulty(frame):
+            self.outbox.append(RECORD.pack(self.sender_id, seq_num, frame.crc, len(frame.data)))
+            self.outbox.append(bytes(frame.data))
+            self.outbox_bytes += RECORD.size + len(frame.data)
+            if self.outbox_bytes >= BATCH_BYTES:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = self.loop.call_soon(self.flush)
+        self.sender.frames.release(frame)
+        self.arm(seq_num)
+
+    def flush(self):
+        # Everything queued during one pass of the event loop leaves in one datagram.
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.outbox:
+            self.impairment.send(self.transport, KIND.pack(DATA) + b''.join(self.outbox))
+            self.outbox = []
+            self.outbox_bytes = 0
+
+    def arm(self, seq_num):
+        self.cancel(seq_num)
+        self.timers[seq_num] = self.loop.call_later(self.timeout, self.expired, seq_num)
+
+    def cancel(self, seq_num):
+        timer = self.timers.pop(seq_num, None)
+        if timer is not None:
+            timer.cancel()
+
+    def expired(self, seq_num):
+        del self.timers[seq_num]
+        if seq_num < self.base or self.done.done():
+            return
+        if self.selective:
+            self.send(seq_num)
+        else:
+            self.go_back()
+
+    def go_back(self):
+        for seq_num in range(self.base, self.next_seq):
+            self.cancel(seq_num)
+        self.next_seq = self.base
+        self.fill()
+
+    def slide(self, base):
+        for seq_num in range(self.base, base):
+            self.cancel(seq_num)
+            self.acked.discard(seq_num)
+        self.base = max(self.base, base)
+        self.next_seq = max(self.next_seq, self.base)
+
+    def datagram_received(self, data, addr):
+        if data[0] != REPLY or self.done.done():
+            return
+        _, next_expected = REPLY_HEADER.unpack_from(data, KIND.size)
+        self.slide(next_expected)
+        go_back = False
+        for offset in range(KIND.size + REPLY_HEADER.size, len(data), ENTRY.size):
+            kind, seq_num = ENTRY.unpack_from(data, offset)
+            if seq_num < self.base or seq_num in self.acked:
+                continue
+            if kind == ACK:
+                if self.selective:
+                    self.acked.add(seq_num)
+                    self.cancel(seq_num)
+            elif self.selective:
+                self.send(seq_num)
+            elif seq_num == self.base:
+                go_back = True
+
+        base = self.base
+        while base in self.acked:
+            base += 1
+        self.slide(base)
+        if self.base >= self.num_frames:
+            self.finish()
+            return
+        if go_back:
+            self.go_back()
+        else:
+            self.fill()
+
+    def finish(self):
+        for seq_num in list(self.timers):
+            self.cancel(seq_num)
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.done.set_result(None)
+
+
+class UdpLink:
+    # Runs a trial over localhost UDP instead of the simulated link: every sender
+    # gets its own socket and all of them run concurrently against one receiver
+    # socket, so throughput is in frames per wall-clock second on this host.
+
+    def __init__(self, senders, receiver, num_frames, timeout, channel=None, impairment=None, selective=False):
+        if isinstance(channel, SymbolicChannel):
+            raise ValueError("The UDP transport sends real frames; use fec_mode='bytes'")
+        self.senders = senders
+        self.receiver = receiver
+        self.num_frames = num_frames
+        self.timeout = timeout
+        self.channel = channel
+        self.impairment = impairment if impairment is not None else Impairment()
+        self.selective = selective
+
+    def run(self):
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        transports = []
+        endpoints = []
+        try:
+            receiver_transport, _ = await loop.create_datagram_endpoint(
+                lambda: ReceiverEndpoint(self.receiver, self.channel, self.impairment), sock=open_socket())
+            transports.append(receiver_transport)
+            address = receiver_transport.get_extra_info('sockname')
+            start = loop.time()
+            for sender_id, sender in enumerate(self.senders):
+                endpoint = SenderEndpoint(sender_id, sender, self.num_frames, self.timeout, self.selective,
+                                          self.impairment, loop.create_future())
+                transport, _ = await loop.create_datagram_endpoint(lambda: endpoint, sock=open_socket(address))
+                transports.append(transport)
+                endpoints.append(endpoint)
+            await asyncio.gather(*(endpoint.done for endpoint in endpoints))
+            elapsed_time = loop.time() - start
+        finally:
+            self.impairment.close()
+            for transport in transports:
+                transport.close()
+
+        total_sent_frames = sum(endpoint.sent for endpoint in endpoints)
+        total_resend_count = sum(endpoint.resent for endpoint in endpoints)
+        throughput = len(self.senders) * self.num_frames / elapsed_time
+        ber = total_resend_count / total_sent_frames
+        return throughput, ber
+
+
+def run_udp(senders, receiver, num_frames, timeout, channel=None, impairment=None, selective=False, profiler=None):
+    link = UdpLink(senders, receiver, num_frames, timeout, channel, impairment, selective)
+    if profiler is not None:
+        profiler.attach(senders, receiver, channel, link)
+    return link.run()
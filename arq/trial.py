@@ -0,0 +1,72 @@
+import inspect
+
+from arq import streams
+from arq.channel import BIT_ERROR_RATE, measured_ber
+from arq.symbolic import prepare_fec, FEC_MODE
+from arq.paired import per_sender_streams
+from arq.importance import ImportanceSampler, reference_throughput
+from arq.transport import Impairment, run_udp, use_udp, TRANSPORT
+from arq.instrument import PhaseProfiler
+from arq.scheduler import SERVICE_ORDER
+
+# Options every script's run_trial passes through to run_endpoints, with their defaults.
+OPTIONS = {
+    'bit_error_rate': BIT_ERROR_RATE,
+    'profile': False,
+    'order': SERVICE_ORDER,
+    'fec_mode': FEC_MODE,
+    'common_random': False,
+    'importance_rate': None,
+    'transport': TRANSPORT,
+    'net_loss': 0.0,
+    'net_delay': 0.0,
+}
+
+
+def trial_parameters(trial_fn):
+    # Names a script's run_trial accepts, with **options expanded to OPTIONS.
+    names = []
+    for name, parameter in inspect.signature(trial_fn).parameters.items():
+        if parameter.kind == parameter.VAR_KEYWORD:
+            names.extend(OPTIONS)
+        else:
+            names.append(name)
+    return names
+
+
+def build_endpoints(seed, topology, sender_class, sender_args, receiver_class, receiver_args):
+    # One sender per sender node of the topology; every endpoint gets its own stream.
+    receiver = receiver_class(*receiver_args, streams.stream(seed, streams.RECEIVER))
+    senders = [sender_class(*sender_args, streams.stream(seed, streams.SENDER, sender_id))
+               for sender_id in range(len(topology.sender_nodes))]
+    return senders, receiver
+
+
+def run_endpoints(seed, senders, receiver, run_simulation, layout, error_rate, frame_size, num_frames, rs_k, rs_n,
+                  timeout, selective=False, bit_error_rate=BIT_ERROR_RATE, profile=False, order=SERVICE_ORDER,
+                  fec_mode=FEC_MODE, common_random=False, importance_rate=None, transport=TRANSPORT,
+                  net_loss=0.0, net_delay=0.0):
+    # The part of a trial every script shares: the channel, the optional modes and
+    # the transport. layout holds run_simulation's topology arguments, which follow
+    # timeout. Returns (throughput, ber, channel_ber), plus the phase profile when
+    # profiling.
+    channel = prepare_fec(fec_mode, bit_error_rate, senders, receiver, rs_n, rs_k,
+                          streams.generator(streams.stream(seed, streams.CHANNEL)))
+    channels = [channel]
+    if common_random:
+        channels = per_sender_streams(seed, receiver, channel, len(senders))
+        channel = None
+    sampler = ImportanceSampler(error_rate, importance_rate, senders + [receiver]) if importance_rate is not None else None
+    profiler = PhaseProfiler() if profile else None
+    if use_udp(transport):
+        impairment = Impairment(net_loss, net_delay, rng=streams.coin(streams.stream(seed, streams.NETWORK)))
+        throughput, ber = run_udp(senders, receiver, num_frames, timeout, channel, impairment, selective, profiler)
+    else:
+        throughput, ber = run_simulation(senders, receiver, num_frames, timeout, *layout, channel=channel,
+                                         profiler=profiler, order=order,
+                                         scheduler_rng=streams.generator(streams.stream(seed, streams.SCHEDULER)))
+    if sampler is not None:
+        throughput, ber = sampler.reweight(throughput, ber, reference_throughput(frame_size, rs_n, rs_k))
+    if profiler is None:
+        return throughput, ber, measured_ber(channels)
+    return throughput, ber, measured_ber(channels), profiler.totals()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from arq.analytic import MAX_TOLERANCE, can_skip, efficiency, predict
+from arq.montecarlo import simulate_point
+
+
+def point(error_rate, num_frames, num_nodes, timeout=1):
+    return dict(error_rate=error_rate, frame_size=600, num_frames=num_frames, num_nodes=num_nodes, rs_k=223,
+                rs_n=255, timeout=timeout, window_size=100)
+
+
+def actual_error(protocol, params):
+    throughput, _ = simulate_point('bus', protocol, params, 20000, np.random.default_rng(1))
+    mean = np.nanmean(throughput)
+    return abs(predict(protocol, 'bus', params).throughput - mean) / mean
+
+
+@pytest.mark.parametrize('params', [point(0.25, 2, 5), point(0.4, 5, 2)])
+def test_few_frames_are_never_skipped(params):
+    # The error estimate falls short of the actual error for these points.
+    assert actual_error('gbn', params) > predict('gbn', 'bus', params).relative_error
+    assert not can_skip('bus', params)
+
+
+@pytest.mark.parametrize('protocol', ['gbn', 'sr'])
+@pytest.mark.parametrize('params', [point(0.05, 60, 5), point(0.25, 90, 25), point(0.1, 20, 3, timeout=0.1),
+                                    point(0.01, 90, 25, timeout=10)])
+def test_estimate_covers_the_error_where_points_may_be_skipped(protocol, params):
+    relative_error = predict(protocol, 'bus', params).relative_error
+    assert can_skip('bus', params)
+    if relative_error <= MAX_TOLERANCE:
+        assert actual_error(protocol, params) <= relative_error
+
+
+def test_efficiency_orders_the_protocols():
+    # With a pipe longer than one frame, a window beats stop-and-wait and SR beats GBN.
+    a, frame_error = 5, 0.1
+    stop_and_wait = efficiency('stop_and_wait', frame_error, a)
+    gbn = efficiency('gbn', frame_error, a, window_size=16)
+    sr = efficiency('sr', frame_error, a, window_size=16)
+    assert stop_and_wait < gbn < sr <= 1 - frame_error
@@ -0,0 +1,32 @@
+import json
+
+from arq import cli
+from arq.cache import SweepCache
+from arq.parallel import run_trials
+from bus import gbn_reed
+
+POINTS = [dict(error_rate=0.1, frame_size=100, num_frames=5, num_nodes=3, rs_k=223, rs_n=255, timeout=1,
+               fec_mode='symbolic')]
+ARGS = ['--topology', 'bus', '--protocol', 'gbn', '--num-frames', '5', '8', '--frame-size', '100', '--trials', '2',
+        '--seed', '1', '--fec-mode', 'symbolic', '--workers', '1']
+
+
+def test_cache_hits_are_marked_and_identical(tmp_path):
+    with SweepCache(str(tmp_path / 'sweep.db')) as cache:
+        [(_, computed)] = run_trials(gbn_reed.run_trial, POINTS, trials=3, seed=1, workers=1, cache=cache)
+        [(_, cached)] = run_trials(gbn_reed.run_trial, POINTS, trials=3, seed=1, workers=1, cache=cache)
+    assert not any(result.cached for result in computed)
+    assert all(result.cached for result in cached)
+    assert [result._replace(cached=False) for result in cached] == computed
+
+
+def test_resumed_sweep_does_not_repeat_records(tmp_path):
+    output = str(tmp_path / 'results.jsonl')
+    args = ARGS + ['--cache', str(tmp_path / 'sweep.db'), '--output', output]
+    cli.main(args)
+    with open(output) as f:
+        first = f.read()
+    cli.main(args)
+    with open(output) as f:
+        assert f.read() == first
+    assert sum(json.loads(line)['kind'] == 'point' for line in first.splitlines()) == 2
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from reedsolo import RSCodec, ReedSolomonError
+
+from arq.fec import NumpyRSCodec, cross_check
+
+CODES = [(10, 255), (16, 127), (32, 255), (8, 60)]
+FRAME_SIZES = [1, 100, 600, 1000]
+
+
+def messages(frame_size, count=5, seed=0):
+    rng = np.random.default_rng(seed)
+    return [bytearray(rng.integers(0, 256, frame_size, dtype=np.uint8).tobytes()) for _ in range(count)]
+
+
+def decode(codec, data):
+    try:
+        return codec.decode(data)
+    except ReedSolomonError:
+        return None
+
+
+@pytest.mark.parametrize('nsym, nsize', CODES)
+@pytest.mark.parametrize('frame_size', FRAME_SIZES)
+def test_encode_matches_reedsolo(nsym, nsize, frame_size):
+    assert cross_check(NumpyRSCodec(nsym, nsize), RSCodec(nsym, nsize), messages(frame_size))
+
+
+@pytest.mark.parametrize('nsym, nsize', CODES)
+@pytest.mark.parametrize('frame_size', FRAME_SIZES)
+def test_decode_matches_reedsolo(nsym, nsize, frame_size):
+    codec = NumpyRSCodec(nsym, nsize)
+    reference = RSCodec(nsym, nsize)
+    rng = np.random.default_rng(frame_size)
+    for message in messages(frame_size):
+        encoded = codec.encode(message)
+        # From clean frames to frames with more symbol errors than the code corrects.
+        for errors in (0, 1, nsym // 2, nsym):
+            corrupted = bytearray(encoded)
+            for position in rng.choice(len(corrupted), min(errors, len(corrupted)), replace=False):
+                corrupted[position] ^= int(rng.integers(1, 256))
+            assert decode(codec, bytearray(corrupted)) == decode(reference, bytearray(corrupted))
+
+
+def test_only_corrupted_codewords_have_syndromes():
+    codec = NumpyRSCodec(16, 255)
+    encoded = np.frombuffer(bytes(codec.encode(messages(600)[0])), dtype=np.uint8)
+    corrupted = encoded.copy()
+    corrupted[300] ^= 0x5a
+    syndromes = codec.chunk_syndromes(np.stack([encoded, corrupted])).any(axis=2)
+    assert not syndromes[0].any()
+    assert syndromes[1].tolist() == [index == 300 // 255 for index in range(len(syndromes[1]))]
@@ -0,0 +1,31 @@
+import math
+
+import pytest
+
+from arq.importance import log_likelihood_ratio
+from arq.montecarlo import simulate_points
+from arq.parallel import finished_stats, run_trials
+from bus import gbn_reed
+
+POINT = dict(error_rate=0.01, frame_size=100, num_frames=20, num_nodes=3, rs_k=223, rs_n=255, timeout=0.1,
+             fec_mode='symbolic', bit_error_rate=0.0)
+
+
+@pytest.mark.parametrize('rate, biased_rate', [(0.01, 0.1), (0.001, 0.3), (0.2, 0.05)])
+def test_weights_average_to_one(rate, biased_rate):
+    # Exact expectation over the number of failures among n coin flips at biased_rate.
+    n = 40
+    expectation = sum(math.comb(n, failures) * biased_rate ** failures * (1 - biased_rate) ** (n - failures)
+                      * math.exp(log_likelihood_ratio(rate, biased_rate, failures, n - failures))
+                      for failures in range(n + 1))
+    assert expectation == pytest.approx(1)
+
+
+def test_weighted_trials_are_unbiased():
+    # Sampled at twice the error rate and weighted back, the event engine should
+    # land within four of its standard errors of a large plain Monte Carlo run.
+    [(_, weighted)] = run_trials(gbn_reed.run_trial, [dict(POINT, importance_rate=0.02)], trials=1000, seed=1,
+                                 workers=1)
+    [(_, plain)] = simulate_points('bus', 'gbn', [POINT], trials=100000, seed=1)
+    for estimate, reference in zip(finished_stats(weighted)[:2], finished_stats(plain)[:2]):
+        assert abs(estimate.mean - reference.mean) <= 4 * estimate.stdev / math.sqrt(estimate.count)
@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+
+from arq.montecarlo import simulate_points
+from arq.parallel import finished_stats, run_trials
+from bus import gbn_reed, sr_reed
+
+TRIALS = 300
+
+
+def point(error_rate, **extra):
+    return dict(error_rate=error_rate, frame_size=100, num_frames=20, num_nodes=3, rs_k=223, rs_n=255, timeout=0.1,
+                fec_mode='symbolic', bit_error_rate=0.002, **extra)
+
+
+def both_engines(module, protocol, params):
+    [(_, events)] = run_trials(module.run_trial, [params], trials=TRIALS, seed=1, workers=1)
+    [(_, drawn)] = simulate_points('bus', protocol, [params], trials=20000, seed=1)
+    return finished_stats(events), finished_stats(drawn)
+
+
+def assert_close(events, drawn):
+    # Within four standard errors of the event engine's estimate.
+    assert abs(events.mean - drawn.mean) <= 4 * events.stdev / math.sqrt(events.count)
+
+
+@pytest.mark.parametrize('error_rate', [0.05, 0.2])
+def test_gbn_engines_agree(error_rate):
+    (throughput, ber, stalled), (mc_throughput, mc_ber, mc_stalled) = both_engines(gbn_reed, 'gbn', point(error_rate))
+    assert stalled == mc_stalled == 0
+    assert_close(throughput, mc_throughput)
+    assert_close(ber, mc_ber)
+
+
+def test_sr_engines_agree_on_stalls():
+    (throughput, ber, stalled), (mc_throughput, mc_ber, mc_stalled) = both_engines(sr_reed, 'sr',
+                                                                                   point(0.05, window_size=8))
+    fraction, mc_fraction = stalled / TRIALS, mc_stalled / 20000
+    assert 0 < fraction < 1
+    assert abs(fraction - mc_fraction) <= 4 * math.sqrt(mc_fraction * (1 - mc_fraction) / TRIALS)
+    assert_close(throughput, mc_throughput)
+    assert_close(ber, mc_ber)
+
+
+def test_sr_never_stalls_with_a_clean_channel():
+    params = dict(point(0.0, window_size=4), bit_error_rate=0.0)
+    [(_, drawn)] = simulate_points('bus', 'sr', [params], trials=100, seed=1)
+    assert not any(np.isnan(result.throughput) for result in drawn)
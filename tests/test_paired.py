@@ -0,0 +1,19 @@
+import math
+
+from arq import cli
+from arq.paired import paired_trial
+
+POINT = dict(error_rate=0.1, frame_size=100, num_frames=20, num_nodes=3, rs_k=223, rs_n=255, timeout=1,
+             window_size=100, fec_mode='symbolic')
+
+
+def test_pairs_that_finish_are_identical_on_the_simulated_link():
+    differences = [paired_trial(seed, 'bus', **POINT) for seed in range(1, 6)]
+    assert all(difference == (0.0, 0.0, 0.0) for difference in differences)
+    assert not any(math.isnan(value) for difference in differences for value in difference)
+
+
+def test_cli_notes_the_identical_pairs(capsys):
+    cli.main(['--topology', 'bus', '--protocol', 'sr', '--paired', '--num-frames', '20', '--frame-size', '100',
+              '--trials', '3', '--seed', '1', '--fec-mode', 'symbolic', '--workers', '1'])
+    assert 'behave identically on the simulated link' in capsys.readouterr().out
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from arq.parallel import run_trials
+from bus import gbn_reed, sr_reed
+
+
+@pytest.mark.parametrize('module, extra', [(gbn_reed, {}), (sr_reed, {'window_size': 4})])
+def test_parallel_matches_serial(module, extra):
+    points = [dict(error_rate=error_rate, frame_size=100, num_frames=10, num_nodes=3, rs_k=223, rs_n=255,
+                   timeout=0.5, bit_error_rate=0.001, fec_mode='symbolic', **extra) for error_rate in (0.05, 0.2)]
+
+    def outcomes(workers):
+        return [(params, [(result.seed, result.throughput, result.ber, result.channel_ber) for result in results])
+                for params, results in run_trials(module.run_trial, points, trials=4, seed=1, workers=workers)]
+
+    # A stalled SR trial is NaN, which assert_equal treats as equal to itself.
+    np.testing.assert_equal(outcomes(1), outcomes(2))
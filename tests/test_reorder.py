@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from arq.reorder import ReorderBuffer
+
+
+def test_out_of_order_frames_are_released_in_runs():
+    buffer = ReorderBuffer(4)
+    buffer.add(1)
+    buffer.add(2)
+    assert buffer.deliver(0) == 0
+    assert len(buffer) == 2
+    buffer.add(0)
+    assert buffer.deliver(0) == 3
+    assert len(buffer) == 0
+    assert 1 not in buffer
+
+
+def test_duplicates_count_once():
+    buffer = ReorderBuffer(4)
+    buffer.add(2)
+    buffer.add(2)
+    assert len(buffer) == 1
+    assert 2 in buffer and 6 in buffer
+
+
+@pytest.mark.parametrize('window_size', [1, 3, 16])
+def test_matches_a_set_of_pending_frames(window_size):
+    # Arrivals anywhere in the receive window, with duplicates, across many wraps.
+    rng = np.random.default_rng(window_size)
+    buffer, pending, expected = ReorderBuffer(window_size), set(), 0
+    for _ in range(2000):
+        seq_num = expected + int(rng.integers(0, window_size))
+        buffer.add(seq_num)
+        pending.add(seq_num)
+        delivered = expected
+        while expected in pending:
+            pending.remove(expected)
+            expected += 1
+        assert buffer.deliver(delivered) == expected
+        assert len(buffer) == len(pending)
+        assert all((seq_num in buffer) == (seq_num in pending) for seq_num in range(expected, expected + window_size))
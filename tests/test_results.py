@@ -0,0 +1,88 @@
+import csv
+import json
+import math
+
+import pytest
+
+from arq.parallel import TrialResult
+from arq.results import ResultsWriter
+
+PARAMS = {'error_rate': 0.1, 'num_frames': 20}
+
+
+def trials(*throughputs):
+    return [TrialResult(trial, trial, throughput, throughput / 1000, 0.01, None, 0.0)
+            for trial, throughput in enumerate(throughputs)]
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def points(path):
+    return [record for record in read_jsonl(path) if record['kind'] == 'point']
+
+
+def test_point_statistics_leave_out_stalled_trials(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    with ResultsWriter(path) as sink:
+        sink.write_point('bus', 'sr', PARAMS, trials(10.0, math.nan, 20.0, math.nan), seed=1)
+    [record] = points(path)
+    assert record['trials'] == 4
+    assert record['stalled'] == 2
+    assert record['throughput'] == pytest.approx(15.0)
+    assert record['ber'] == pytest.approx(0.015)
+
+
+def test_point_that_always_stalls_has_no_mean(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    with ResultsWriter(path) as sink:
+        sink.write_point('bus', 'sr', PARAMS, trials(math.nan, math.nan), seed=1)
+    [record] = points(path)
+    assert record['stalled'] == 2
+    assert record['throughput'] is None
+    assert record['throughput_ci'] is None
+
+
+def read(path, fmt):
+    if fmt == 'jsonl':
+        return read_jsonl(path)
+    if fmt == 'csv':
+        with open(path, newline='') as f:
+            return list(csv.DictReader(f))
+    pa = pytest.importorskip('pyarrow')
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pylist()
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all().to_pylist()
+
+
+@pytest.mark.parametrize('fmt', ['jsonl', 'csv', 'parquet', 'arrow'])
+def test_every_format_appends(tmp_path, fmt):
+    if fmt in ('parquet', 'arrow'):
+        pytest.importorskip('pyarrow')
+    path = str(tmp_path / f'results.{fmt}')
+    for seed in (1, 2):
+        with ResultsWriter(path, buffer_size=2) as sink:
+            sink.write_point('bus', 'gbn', PARAMS, trials(10.0, 20.0, 30.0), seed=seed)
+    records = read(path, fmt)
+    assert len(records) == 8
+    assert [int(record['seed']) for record in records if record['kind'] == 'point'] == [1, 2]
+    assert not (tmp_path / f'results.{fmt}.partial').exists()
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_file_with_other_fields_is_refused(tmp_path, fmt):
+    if fmt == 'parquet':
+        pa = pytest.importorskip('pyarrow')
+        import pyarrow.parquet as pq
+        path = str(tmp_path / 'results.parquet')
+        pq.write_table(pa.table({'kind': ['point']}), path)
+    else:
+        path = str(tmp_path / 'results.csv')
+        with open(path, 'w') as f:
+            f.write('kind,throughput\npoint,1.0\n')
+    with pytest.raises(ValueError, match='other fields'):
+        ResultsWriter(path)
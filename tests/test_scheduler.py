@@ -0,0 +1,50 @@
+import bisect
+import itertools
+
+import numpy as np
+import pytest
+
+from arq.scheduler import SCHEDULERS, get_scheduler
+
+
+class FixedDraw:
+    # Stands in for a Generator so next() searches for a chosen target.
+    target = 0
+
+    def integers(self, high):
+        assert 0 <= self.target < high
+        return self.target
+
+
+def ack_randomly(scheduler, rng, count):
+    for _ in range(count):
+        unfinished = [sender_id for sender_id, left in enumerate(scheduler.remaining) if left > 0]
+        scheduler.acked(int(rng.choice(unfinished)))
+
+
+@pytest.mark.parametrize('num_senders', [1, 2, 5, 8, 13])
+def test_weighted_search_finds_the_sender_owning_each_target(num_senders):
+    draw = FixedDraw()
+    scheduler = get_scheduler('weighted', num_senders, 4, draw)
+    ack_randomly(scheduler, np.random.default_rng(num_senders), 2 * num_senders)
+    cumulative = list(itertools.accumulate(scheduler.remaining))
+    for draw.target in range(cumulative[-1]):
+        sender_id = scheduler.next(0)
+        assert sender_id == bisect.bisect_right(cumulative, draw.target)
+        assert scheduler.remaining[sender_id] > 0
+
+
+@pytest.mark.parametrize('order', sorted(SCHEDULERS))
+def test_only_unfinished_senders_are_served(order):
+    rng = np.random.default_rng(1)
+    scheduler = get_scheduler(order, 7, 3, rng)
+    served, sender_id = [], 0
+    while True:
+        sender_id = scheduler.next(sender_id)
+        if sender_id is None:
+            break
+        assert scheduler.remaining[sender_id] > 0
+        served.append(sender_id)
+        scheduler.acked(sender_id)
+    assert sorted(served) == sorted(list(range(7)) * 3)
+    assert len(scheduler) == 0
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pytest
+
+from arq.parallel import run_adaptive, stalled
+from arq.stats import RunningStats, t_cdf, t_quantile
+from bus import sr_reed
+
+
+@pytest.mark.parametrize('df, quantile', [(1, 12.7062), (4, 2.7764), (10, 2.2281), (30, 2.0423), (200, 1.9719)])
+def test_t_quantile_matches_tables(df, quantile):
+    assert t_quantile(0.975, df) == pytest.approx(quantile, abs=1e-4)
+    assert t_cdf(t_quantile(0.975, df), df) == pytest.approx(0.975)
+    assert t_quantile(0.025, df) == -t_quantile(0.975, df)
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(10, 3, 50)
+    stats = RunningStats(values)
+    assert stats.count == 50
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var(ddof=1))
+    low, high = stats.interval()
+    assert high - low == pytest.approx(2 * t_quantile(0.975, 49) * values.std(ddof=1) / math.sqrt(50))
+
+
+def noisy_trial(seed, spread):
+    return 100 + spread * np.random.default_rng(seed).standard_normal(), 0.0, 0.0
+
+
+def stalling_trial(seed):
+    return math.nan, math.nan, 0.0
+
+
+def sometimes_stalling_trial(seed):
+    if seed % 3 == 0:
+        return math.nan, math.nan, 0.0
+    return noisy_trial(seed, 5)
+
+
+def adaptive(trial_fn, points, **rule):
+    return list(run_adaptive(trial_fn, points, seed=1, workers=1, **rule))
+
+
+def test_quiet_point_stops_at_min_trials():
+    [(_, results)] = adaptive(noisy_trial, [{'spread': 0.01}], min_trials=5, max_trials=200, target=0.05)
+    assert len(results) == 5
+
+
+def test_noisy_point_runs_until_the_interval_is_narrow():
+    [(_, results)] = adaptive(noisy_trial, [{'spread': 20}], min_trials=5, max_trials=1000, target=0.02)
+    stats = RunningStats(result.throughput for result in results)
+    assert 5 < len(results) < 1000
+    assert stats.relative_half_width() <= 0.02
+
+
+def test_budget_caps_the_trials():
+    [(_, results)] = adaptive(noisy_trial, [{'spread': 20}], min_trials=5, max_trials=40, target=0.0001)
+    assert len(results) == 40
+
+
+def test_point_that_always_stalls_stops_after_min_trials():
+    [(_, results)] = adaptive(stalling_trial, [{}], min_trials=5, max_trials=200, target=0.05)
+    assert len(results) == 5
+    assert all(stalled(result) for result in results)
+
+
+def test_stalled_trials_stay_out_of_the_interval():
+    [(_, results)] = adaptive(sometimes_stalling_trial, [{}], min_trials=5, max_trials=500, target=0.01)
+    finished = RunningStats(result.throughput for result in results if not stalled(result))
+    assert any(stalled(result) for result in results)
+    assert finished.relative_half_width() <= 0.01
+
+
+def test_adaptive_sr_with_a_small_window():
+    # With a two-frame window most trials stall for good and report NaN.
+    points = [dict(error_rate=error_rate, frame_size=100, num_frames=20, num_nodes=3, rs_k=223, rs_n=255,
+                   timeout=1, window_size=2, fec_mode='symbolic') for error_rate in (0.01, 0.1, 0.3)]
+    outcomes = adaptive(sr_reed.run_trial, points, min_trials=5, max_trials=60, target=0.05)
+    assert [params for params, _ in outcomes] == points
+    assert any(stalled(result) for _, results in outcomes for result in results)
+    assert all(5 <= len(results) <= 60 for _, results in outcomes)
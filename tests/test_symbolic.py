@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+from arq.symbolic import cross_validate
+
+
+@pytest.mark.parametrize('frame_size, rs_n, rs_k', [(600, 255, 223), (100, 255, 223), (600, 127, 111)])
+def test_symbolic_agrees_with_bytes(frame_size, rs_n, rs_k):
+    frames, disagreements, accepted = cross_validate(frame_size, rs_n, rs_k, 0.005, num_frames=200,
+                                                     rng=np.random.default_rng(1))
+    assert frames == 200
+    assert disagreements == 0
+    assert accepted > 0